@@ -0,0 +1,136 @@
+"""Summaries of the occupancy over the slot grid for capacity planning."""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from common import (
+    COL_FACULTAD,
+    COL_HORA_PRESENCIAL,
+    COL_HORA_VIRTUAL,
+    COL_STATUS,
+    DERIVED_COL_DOW,
+    DERIVED_COL_HORARIO_ERROR,
+    DERIVED_COL_START,
+    DERIVED_COL_STOP,
+    DOW,
+    NUM_2_DOW,
+    horario_columns,
+    minutes_to_time,
+    parse_min_series,
+    time_to_minutes,
+)
+from occupancy import SLOT_MINUTES, TOTAL_SLOTS, _grouped_occupancy
+
+MODALITIES = ["Presencial", "Virtual", "Sin horas"]
+
+# Exact Estado values of each group, any other value is "Otro estado".
+# The calendar tags (status_to_tag) are not used as they match substrings.
+STATUS_GROUPS = {
+    "Cubierto": ("X", "XP"),
+    "Vacante": ("VACANTE", ),
+    "Licencia": ("LICENCIA", ),
+    "Otro estado": (),
+}
+
+
+def valid_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows with a valid Horarios, the others are shown on Sunday from 8 to 9 and would count there."""
+    parsed = horario_columns(df)
+    return df[(parsed[DERIVED_COL_HORARIO_ERROR].astype(str) == "").to_numpy()]
+
+
+def _events(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    parsed = horario_columns(df)
+    return (
+        parsed[DERIVED_COL_DOW].to_numpy(),
+        parsed[DERIVED_COL_START].to_numpy(),
+        parsed[DERIVED_COL_STOP].to_numpy(),
+    )
+
+
+def modality_occupancy(df: pd.DataFrame) -> np.ndarray:
+    """Returns a (len(MODALITIES), 7, TOTAL_SLOTS) weighted occupancy.
+
+    Each row is split between Presencial and Virtual in proportion to
+    its Hora presencial and Hora virtual, rows without hours count as
+    Sin horas. So the modalities add up to the count of active events.
+    """
+    presencial = parse_min_series(df[COL_HORA_PRESENCIAL]).fillna(0).clip(lower=0).to_numpy()
+    virtual = parse_min_series(df[COL_HORA_VIRTUAL]).fillna(0).clip(lower=0).to_numpy()
+    total = presencial + virtual
+    has_hours = total > 0
+    safe_total = np.where(has_hours, total, 1)
+
+    weights = np.concatenate([
+        np.where(has_hours, presencial / safe_total, 0),
+        np.where(has_hours, virtual / safe_total, 0),
+        np.where(has_hours, 0, 1),
+    ]).astype(float)
+
+    dows, starts, stops = _events(df)
+    groups = np.repeat(np.arange(len(MODALITIES)), len(df))
+    out = _grouped_occupancy(
+        groups, len(MODALITIES), np.tile(dows, 3), np.tile(starts, 3), np.tile(stops, 3), weights
+    )
+    # remove the rounding error of the cumulative sum of fractions
+    return np.round(out, 9)
+
+
+def status_occupancy(df: pd.DataFrame) -> np.ndarray:
+    """Returns a (len(STATUS_GROUPS), 7, TOTAL_SLOTS) occupancy, by Estado in STATUS_GROUPS order."""
+    codes = np.full(len(df), len(STATUS_GROUPS) - 1, dtype=np.int64)
+    for code, statuses in enumerate(STATUS_GROUPS.values()):
+        if statuses:
+            codes[df[COL_STATUS].isin(statuses).to_numpy()] = code
+
+    dows, starts, stops = _events(df)
+    return _grouped_occupancy(codes, len(STATUS_GROUPS), dows, starts, stops)
+
+
+def faculty_occupancy(df: pd.DataFrame) -> tuple[list, np.ndarray]:
+    """Returns the faculties and their (faculty, 7, TOTAL_SLOTS) occupancy."""
+    codes, faculties = pd.factorize(df[COL_FACULTAD], sort=True)
+    known = codes >= 0
+    dows, starts, stops = _events(df)
+    return list(faculties), _grouped_occupancy(codes[known], len(faculties), dows[known], starts[known], stops[known])
+
+
+def peak_summary(occupancy: np.ndarray, labels: list, dows: list[DOW], start: datetime.time, stop: datetime.time, *, label_column: str = "") -> pd.DataFrame:
+    """Peak load of each group of the occupancy between start and stop of the given days.
+
+    Returns a row per label with the peak, the day and time it first
+    happens, the mean load and the hours of class (load x time) in the window.
+    """
+    dows = sorted(set(dows))
+    first = time_to_minutes(start) // SLOT_MINUTES
+    last = min(-(-time_to_minutes(stop) // SLOT_MINUTES), TOTAL_SLOTS)
+
+    window = occupancy[:, dows, first:last]
+    n_slots = window.shape[2]
+    flat = window.reshape(len(labels), len(dows) * n_slots)
+
+    if flat.shape[1] == 0:
+        peaks = np.zeros(len(labels))
+        where = np.zeros(len(labels), dtype=int)
+        means = np.zeros(len(labels))
+    else:
+        peaks = flat.max(axis=1)
+        where = flat.argmax(axis=1)
+        means = flat.mean(axis=1)
+
+    has_peak = peaks > 0
+    return pd.DataFrame({
+        label_column: labels,
+        "Pico": peaks,
+        "Día del pico": [
+            NUM_2_DOW[dows[ndx // n_slots]] if ok else "" for ndx, ok in zip(where, has_peak)
+        ],
+        "Hora del pico": [
+            minutes_to_time((first + ndx % n_slots) * SLOT_MINUTES).strftime("%H:%M") if ok else ""
+            for ndx, ok in zip(where, has_peak)
+        ],
+        "Promedio": means,
+        "Horas": window.sum(axis=(1, 2)) * SLOT_MINUTES / 60,
+    })
@@ -0,0 +1,102 @@
+import datetime
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from common import (
+    COL_NOMBRE,
+    DERIVED_COL_DOW,
+    DERIVED_COL_START,
+    DERIVED_COL_STOP,
+    DOW,
+    horario_columns,
+    time_to_minutes,
+)
+from occupancy import SLOT_MINUTES, TOTAL_SLOTS
+
+# Each slot of the grid is a bitmask with one bit per minute,
+# which keeps the checks exact for times not aligned to the grid.
+SLOT_DTYPE = np.uint16
+assert SLOT_MINUTES <= np.iinfo(SLOT_DTYPE).bits
+
+
+def interval_masks(start: np.ndarray, stop: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Splits [start, stop) intervals (in minutes) over the slot grid.
+
+    Returns (interval index, slot, minute bitmask) for every slot touched
+    by an interval. Empty or reversed intervals do not touch any slot.
+    """
+    start = np.asarray(start, dtype=np.int64)
+    stop = np.asarray(stop, dtype=np.int64)
+
+    first = start // SLOT_MINUTES
+    last = (stop - 1) // SLOT_MINUTES
+    counts = np.where(stop > start, last - first + 1, 0)
+
+    ndx = np.repeat(np.arange(len(start)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    slot = first[ndx] + offset
+
+    lo = np.clip(start[ndx] - slot * SLOT_MINUTES, 0, SLOT_MINUTES)
+    hi = np.clip(stop[ndx] - slot * SLOT_MINUTES, 0, SLOT_MINUTES)
+    mask = ((1 << hi) - (1 << lo)).astype(SLOT_DTYPE)
+
+    return ndx, slot, mask
+
+
+class Availability(NamedTuple):
+    """Busy minutes of every person over the slot grid.
+
+    busy[person, dow, slot] has bit i set if the person is busy
+    in minute i of that slot. has_events[person, dow] is True if the
+    person has any event that day. events has a (person, dow, start, stop)
+    row per event, for the queries that need the events themselves.
+    """
+    names: np.ndarray
+    busy: np.ndarray
+    has_events: np.ndarray
+    events: np.ndarray
+
+    def is_busy(self, dow: DOW | None, start: datetime.time, stop: datetime.time) -> np.ndarray:
+        """Returns a bool per person, True if busy between start and stop.
+
+        If dow is None, any day of the week counts. As in Schedule.is_busy,
+        if stop is not after start a single event must run from before stop
+        to after start (e.g. contain the instant start == stop).
+        """
+        start_min, stop_min = time_to_minutes(start), time_to_minutes(stop)
+
+        if stop_min <= start_min:
+            person, event_dow, event_start, event_stop = self.events.T
+            hit = (event_start < stop_min) & (event_stop > start_min)
+            if dow is not None:
+                hit &= event_dow == dow
+            return np.bincount(person[hit], minlength=len(self.names)) > 0
+
+        _, slots, masks = interval_masks([start_min], [stop_min])
+        days = slice(None) if dow is None else slice(dow, dow + 1)
+        busy = self.busy[:, days, slots[0]:slots[-1] + 1] & masks
+        return busy.any(axis=(1, 2))
+
+
+def build_availability(df: pd.DataFrame) -> Availability:
+    parsed = horario_columns(df)
+
+    codes, names = pd.factorize(df[COL_NOMBRE], sort=True)
+    valid = codes >= 0
+    codes = codes[valid]
+    dows = parsed[DERIVED_COL_DOW].to_numpy()[valid]
+
+    has_events = np.zeros((len(names), 7), dtype=bool)
+    has_events[codes, dows] = True
+
+    starts = parsed[DERIVED_COL_START].to_numpy()[valid]
+    stops = parsed[DERIVED_COL_STOP].to_numpy()[valid]
+
+    ndx, slots, masks = interval_masks(starts, stops)
+    busy = np.zeros((len(names), 7, TOTAL_SLOTS), dtype=SLOT_DTYPE)
+    np.bitwise_or.at(busy, (codes[ndx], dows[ndx], slots), masks)
+
+    events = np.stack([codes, dows, starts, stops], axis=1).astype(np.int32)
+    return Availability(np.asarray(names, dtype=object), busy, has_events, events)
@@ -0,0 +1,72 @@
+"""Compares the excel writers exporting a workbook per person of a synthetic dataset.
+
+    python bench_export.py [rows] [people]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import excel_writer
+from common import (
+    COL_ASIGNATURA,
+    COL_CARRERA,
+    COL_COMISION,
+    COL_FACULTAD,
+    COL_HORA_PRESENCIAL,
+    COL_HORA_VIRTUAL,
+    COL_HORARIOS,
+    COL_NOMBRE,
+    COL_OBSERVACIONES,
+    COL_TURNO,
+    COL_YEAR,
+    NUM_2_DOW,
+)
+
+
+def synthetic_assignments(rows: int, people: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    start = rng.integers(8, 21, rows)
+    return pd.DataFrame({
+        COL_FACULTAD: rng.choice(["Ingeniería", "Ciencias", "Humanidades"], rows),
+        COL_CARRERA: rng.choice([f"Carrera {i}" for i in range(12)], rows),
+        COL_ASIGNATURA: rng.choice([f"Asignatura {i}" for i in range(150)], rows),
+        COL_YEAR: rng.integers(1, 6, rows),
+        COL_TURNO: rng.choice(["Mañana", "Tarde", "Noche"], rows),
+        COL_COMISION: rng.integers(1, 10, rows),
+        COL_HORARIOS: [
+            f"{NUM_2_DOW[dow]} de {h}:00 a {h + 2}:00 h"
+            for dow, h in zip(rng.integers(0, 6, rows), start)
+        ],
+        COL_HORA_PRESENCIAL: rng.choice(["120'", "90'", "60'", ""], rows),
+        COL_HORA_VIRTUAL: rng.choice(["30'", ""], rows),
+        COL_OBSERVACIONES: rng.choice(["", "", "Observación"], rows),
+        COL_NOMBRE: rng.choice([f"Persona {i}" for i in range(people)], rows),
+    })
+
+
+def bench(df: pd.DataFrame, writer: str) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    size = 0
+    for _, person_df in df.groupby(COL_NOMBRE, sort=True):
+        size += len(excel_writer.write_workbook({"Cargos activos": person_df}, writer))
+    size += len(excel_writer.write_workbook({"listado": df}, writer))
+    return time.perf_counter() - t0, size
+
+
+def main(rows: int = 4000, people: int = 500):
+    df = synthetic_assignments(rows, people)
+    print(f"{rows} asignaciones, {df[COL_NOMBRE].nunique()} personas")
+    for writer in excel_writer.EXCEL_WRITERS[1:]:
+        try:
+            elapsed, size = bench(df, writer)
+        except ImportError as ex:
+            print(f"{writer:>12}: no disponible ({ex})")
+            continue
+        print(f"{writer:>12}: {elapsed:7.2f} s, {size // 1024} KB")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
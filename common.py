@@ -1,23 +1,43 @@
 import streamlit as st
 import io
+import bisect
 import datetime
+import heapq
+import html
+import itertools
+import multiprocessing
+import os
+import pathlib
+import tempfile
+import textwrap
+import numpy as np
 import pandas as pd
 import pytz
-from typing import Any, Literal, Mapping, NamedTuple
+from typing import Any, Callable, Literal, Mapping, NamedTuple
 import requests
+from requests.adapters import HTTPAdapter
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from calendar_view.calendar import Calendar
 from calendar_view.core.event import EventStyles, Event, style
 from calendar_view.core import data
 
+import functools
 from functools import cache
 
+import excel_reader
+import import_cache
+from dataset_registry import REGISTRY, Dataset
+
 type DOW = Literal[0, 1, 2, 3, 4, 5, 6]
 
 # this is necessary to fix a bug in calendar_view
 style.event_radius = 2
 
+# DataFrames are shared between sessions, so derived frames must never write into them.
+pd.set_option("mode.copy_on_write", True)
+
 version = "2026-07-25"
 
 DOW_2_NUM: dict[str, DOW]= {
@@ -29,6 +49,7 @@ DOW_2_NUM: dict[str, DOW]= {
     "Sábado": 5,
     "Domingo": 6,
 }
+NUM_2_DOW: dict[DOW, str] = {v: k for k, v in DOW_2_NUM.items()}
 
 EVENT_TAG_OK = 1
 EVENT_TAG_ERROR = 2
@@ -49,7 +70,6 @@ COL_ASIGNATURA = "Asignatura"
 COL_YEAR = "Año"
 COL_TURNO = "Turno"
 COL_COMISION = "Com"
-MULTICOL_COMISION = [COL_FACULTAD, COL_CARRERA] + [COL_ASIGNATURA, COL_YEAR, COL_YEAR, COL_COMISION]
 COL_NOMBRE = "Nombre"
 COL_HORARIOS = "Horarios"
 COL_STATUS = "Estado"
@@ -57,6 +77,16 @@ COL_HORA_PRESENCIAL = "Hora presencial"
 COL_HORA_VIRTUAL = "Hora virtual"
 COL_OBSERVACIONES = "Observaciones Planilla"
 DERIVED_COL_YEAR_TURNO_COM = "_Año_Turno_Com"
+DERIVED_COL_COM_STRING = "_Comision"
+DERIVED_COL_COM_KEY = "_Clave_Comision"
+DERIVED_COL_DOW = "_Dia"
+DERIVED_COL_START = "_Inicio"
+DERIVED_COL_STOP = "_Fin"
+DERIVED_COL_TAG = "_Etiqueta"
+DERIVED_COL_HORARIO_ERROR = "_Error_Horario"
+DERIVED_COLS_HORARIO = [
+    DERIVED_COL_DOW, DERIVED_COL_START, DERIVED_COL_STOP, DERIVED_COL_TAG, DERIVED_COL_HORARIO_ERROR,
+]
 
 COL_AREA = "Area"
 COL_EMAIL = "email"
@@ -68,7 +98,42 @@ REQUIRED_COLS = [
     COL_HORA_PRESENCIAL,
 ]
 
-CALENDAR_BUFFER = io.BytesIO()
+# Number of processes used to parse the sheets of a workbook (1 is sequential).
+IMPORT_WORKERS = int(os.environ.get("ACAD_IMPORT_WORKERS", "1"))
+
+# Process pools are started from the threads of the server, where forking
+# could copy a lock held by another thread, so workers are spawned.
+POOL_CONTEXT = multiprocessing.get_context("spawn")
+
+DOWNLOAD_MAX_BYTES = int(os.environ.get("ACAD_DOWNLOAD_MAX_MB", "100")) * 1024 * 1024
+# Downloads larger than this are spooled to disk instead of memory.
+DOWNLOAD_SPOOL_BYTES = 8 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# (connect, read) in seconds
+DOWNLOAD_TIMEOUT = (10, 60)
+
+# Bounds of the st.cache_data caches of the pages. Their entries are keyed by
+# the content of the arguments, so every import adds new ones.
+DATA_CACHE_MAX_ENTRIES = 64
+DATA_CACHE_TTL = datetime.timedelta(hours=6)
+
+# Store low-cardinality text columns as categoricals (see compact_dtypes).
+COMPACT_STORAGE = os.environ.get("ACAD_COMPACT_STORAGE", "1") == "1"
+
+COMPACT_CATEGORY_COLUMNS = [
+    COL_FACULTAD, COL_CARRERA, COL_ASIGNATURA, COL_TURNO, COL_COMISION, COL_STATUS, COL_NOMBRE,
+    COL_HORA_PRESENCIAL, COL_HORA_VIRTUAL, DERIVED_COL_YEAR_TURNO_COM, DERIVED_COL_HORARIO_ERROR,
+    DERIVED_COL_COM_STRING, DERIVED_COL_COM_KEY,
+]
+
+# Rows with an invalid Horarios are shown on Sunday from 8 to 9.
+ERROR_DOW: DOW = 6
+ERROR_START_MIN = 8 * 60
+ERROR_STOP_MIN = 9 * 60
+
+# Fast path for parse + parse_time, anything else goes through the scalar parser.
+HORARIO_PATTERN = r"^(?P<dow>[^ ]*) de (?P<start>[^ ]*) a (?P<stop>[^ ]*) h$"
+TIME_PATTERN = r"^\s*(?P<hour>\d+)\s*(?::\s*(?P<minute>\d+)\s*)?$"
 
 @cache
 def parse_time(s: str) -> datetime.time:
@@ -77,47 +142,118 @@ def parse_time(s: str) -> datetime.time:
     h, m = s.split(":")
     return datetime.time(int(h.strip()), int(m.strip()))
     
+@cache
+def minutes_to_time(minutes: int) -> datetime.time:
+    return datetime.time(minutes // 60, minutes % 60)
+
+def time_to_minutes(t: datetime.time) -> int:
+    return t.hour * 60 + t.minute
+
 def parse_min(s: str) -> float:
     return float(s.replace("'", "")) / 60.
 
+def parse_min_series(s: pd.Series) -> pd.Series:
+    """Vectorized parse_min, values that are not valid strings are NaN."""
+    text = s.astype(object).str.replace("'", "", regex=False)
+    return pd.to_numeric(text, errors="coerce") / 60.
+
 class ScheduleEvent(NamedTuple):
     start: datetime.time
     stop: datetime.time
     title: str
     tag: int
 
+    @property
+    def start_minutes(self) -> int:
+        return time_to_minutes(self.start)
+
+    @property
+    def stop_minutes(self) -> int:
+        return time_to_minutes(self.stop)
+
     @property
     def duration(self) -> float:
-        dt1 = datetime.datetime.combine(datetime.datetime.min, self.start)
-        dt2 = datetime.datetime.combine(datetime.datetime.min, self.stop)
-        
-        # Compute the difference in seconds
-        diff_seconds = (dt2 - dt1).total_seconds()
-        
-        # Convert seconds to hours
-        diff_hours = diff_seconds / 3600  
-        return diff_hours
+        return (self.stop_minutes - self.start_minutes) / 60
+
+
+def overlapping_intervals(starts: list[int], stops: list[int]) -> list[tuple[int, int]]:
+    """Returns the (i, j) positions, i < j, of every pair of overlapping [start, stop) intervals.
+
+    starts must be sorted. Sweeps the intervals keeping a heap of the ones
+    still open. Empty and reversed intervals do not overlap anything.
+    """
+    out = []
+    active: list[tuple[int, int]] = []
+    for ndx, (start, stop) in enumerate(zip(starts, stops)):
+        if stop <= start:
+            continue
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for other in sorted(other for _, other in active):
+            out.append((other, ndx))
+        heapq.heappush(active, (stop, ndx))
+    return out
 
 
 class Schedule(defaultdict[DOW, list[ScheduleEvent]]):
+    """Events by day of the week, sorted by start time.
+
+    The start and stop of the events of each day are also kept as integer
+    minutes, together with the running maximum of the stops, so that
+    overlap queries bisect instead of scanning every event, and the
+    total minutes of each day are kept as events are added.
+
+    Events must be added with add_event (or create_and_add_event).
+    """
+
     def __init__(self):
         super().__init__(list)
+        self._starts: defaultdict[DOW, list[int]] = defaultdict(list)
+        self._stops: defaultdict[DOW, list[int]] = defaultdict(list)
+        # running max of _stops, rebuilt on demand after an insertion
+        self._reach: dict[DOW, list[int]] = {}
+        self._minutes: defaultdict[DOW, int] = defaultdict(int)
 
     def add_event(self, dow: DOW, event: ScheduleEvent):
-        self[dow].append(event)
+        starts = self._starts[dow]
+        ndx = bisect.bisect_right(starts, event.start_minutes)
+        starts.insert(ndx, event.start_minutes)
+        self._stops[dow].insert(ndx, event.stop_minutes)
+        self[dow].insert(ndx, event)
+        self._reach.pop(dow, None)
+        self._minutes[dow] += event.stop_minutes - event.start_minutes
 
     def create_and_add_event(self, dow: DOW, start_str: str, stop_str: str, title: str, *, tag: int = 0):
-        self[dow].append(ScheduleEvent(
+        self.add_event(dow, ScheduleEvent(
             parse_time(start_str), 
             parse_time(stop_str), 
             title, tag)
             )
 
+    def _running_max_stop(self, dow: DOW) -> list[int]:
+        if dow not in self._reach:
+            self._reach[dow] = list(itertools.accumulate(self._stops[dow], max))
+        return self._reach[dow]
+
     def hours(self, dow: DOW) -> float:
-        return sum(ev.duration for ev in self[dow])
+        return self._minutes.get(dow, 0) / 60
 
     def is_busy(self, dow: DOW, start: datetime.time, stop: datetime.time) -> bool:
-        return any(not (ev.stop <= start or ev.start >= stop) for ev in self[dow])
+        if not self._starts.get(dow):
+            return False
+        # Only events starting before stop can overlap,
+        # and one of them does if it ends after start.
+        ndx = bisect.bisect_left(self._starts[dow], time_to_minutes(stop))
+        return ndx > 0 and self._running_max_stop(dow)[ndx - 1] > time_to_minutes(start)
+
+    def overlapping_pairs(self, dow: DOW | None = None) -> list[tuple[DOW, ScheduleEvent, ScheduleEvent]]:
+        """Returns every pair of overlapping events (of a day or of the whole week)."""
+        out = []
+        for day in (sorted(self._starts) if dow is None else (dow, )):
+            events = self.get(day, [])
+            for i, j in overlapping_intervals(self._starts[day], self._stops[day]):
+                out.append((day, events[i], events[j]))
+        return out
 
     def yield_events(self):
         for dow, evs in self.items():
@@ -139,198 +275,531 @@ def parse(s):
     return dow, start.replace(".", ":"), stop.replace(".", ":")
 
 
-def parse_into_event(row: Mapping[str, Any], *, title_prefix: str = "", com_string_to_add: str | None = None) -> tuple[int, ScheduleEvent]:
-    title = title_prefix 
-    if com_string_to_add is None:
-        title += com_string(row)
-    else:
-        title += com_string_to_add
+def status_to_tag(status: Any) -> int:
+    if status in ("X", "XP"):
+        return EVENT_TAG_OK
+    elif status in ("LICENCIA"):
+        return EVENT_TAG_LICENSE
+    elif status in ("VACANTE"):
+        return EVENT_TAG_VACANT
+    return EVENT_TAG_ERROR
+
 
+def parse_horario(horario: Any, status: Any = None) -> tuple[DOW, int, int, int, str]:
+    """Parses a single Horarios value into (dow, start, stop, tag, error).
+
+    start and stop are given in minutes since midnight. If the value cannot
+    be parsed, the event is placed on Sunday from 8 to 9 with EVENT_TAG_ERROR
+    and error contains the text to append to the title.
+    """
     tag = EVENT_TAG_ERROR
     try:
-        dow, start_str, stop_str = parse(row[COL_HORARIOS])
+        dow, start_str, stop_str = parse(horario)
         dow = DOW_2_NUM[dow]
         start = parse_time(start_str)
         stop = parse_time(stop_str)
 
-        if COL_STATUS in row:
-            if row[COL_STATUS] in ("X", "XP"):
-                tag = EVENT_TAG_OK
-            elif row[COL_STATUS] in ("LICENCIA"):
-                tag = EVENT_TAG_LICENSE
-            elif row[COL_STATUS] in ("VACANTE"):
-                tag = EVENT_TAG_VACANT
+        if status is not None:
+            tag = status_to_tag(status)
 
     except Exception as ex:
-        title += f" ({row['Horarios']}) {ex}"
-        dow = 6
-        start = datetime.time(8)
-        stop = datetime.time(9)
+        return ERROR_DOW, ERROR_START_MIN, ERROR_STOP_MIN, EVENT_TAG_ERROR, f" ({horario}) {ex}"
+
+    return dow, time_to_minutes(start), time_to_minutes(stop), tag, ""
+
+
+def parse_into_event(row: Mapping[str, Any], *, title_prefix: str = "", com_string_to_add: str | None = None) -> tuple[int, ScheduleEvent]:
+    title = title_prefix 
+    if com_string_to_add is None:
+        title += com_string(row)
+    else:
+        title += com_string_to_add
+
+    status = row[COL_STATUS] if COL_STATUS in row else None
+    dow, start, stop, tag, error = parse_horario(row[COL_HORARIOS], status)
+    title += error
+
+    return dow, ScheduleEvent(minutes_to_time(start), minutes_to_time(stop), title, tag)
 
-    return dow, ScheduleEvent(start, stop, title, tag)
+
+def _parse_minutes(s: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """Vectorized parse_time returning minutes since midnight and a validity mask."""
+    parts = s.str.replace(".", ":", regex=False).str.extract(TIME_PATTERN)
+    hour = pd.to_numeric(parts["hour"], errors="coerce")
+    minute = pd.to_numeric(parts["minute"], errors="coerce").fillna(0)
+    valid = hour.between(0, 23) & minute.between(0, 59)
+    return (hour * 60 + minute).where(valid), valid
+
+
+def _status_to_tag_or_none(status: Any) -> int | None:
+    try:
+        return status_to_tag(status)
+    except Exception:
+        return None
+
+
+def parse_horarios(df: pd.DataFrame) -> pd.DataFrame:
+    """Parses the Horarios column of a DataFrame in a single columnar pass.
+
+    Returns a DataFrame with the same index and the DERIVED_COLS_HORARIO columns.
+    Rows that do not match the common format are handed to parse_horario,
+    so the results (including the error fallback) are the same as parse_into_event.
+    """
+    parts = df[COL_HORARIOS].astype(str).str.strip().str.extract(HORARIO_PATTERN)
+
+    dow = parts["dow"].map(DOW_2_NUM)
+    start, valid_start = _parse_minutes(parts["start"])
+    stop, valid_stop = _parse_minutes(parts["stop"])
+
+    if COL_STATUS in df.columns:
+        # Few distinct values, so the tag is computed once per status.
+        codes, uniques = pd.factorize(df[COL_STATUS], use_na_sentinel=False)
+        tag = pd.Series(
+            np.asarray([_status_to_tag_or_none(u) for u in uniques], dtype=float)[codes],
+            index=df.index,
+        )
+    else:
+        tag = pd.Series(float(EVENT_TAG_ERROR), index=df.index)
+
+    out = pd.DataFrame({
+        DERIVED_COL_DOW: dow,
+        DERIVED_COL_START: start,
+        DERIVED_COL_STOP: stop,
+        DERIVED_COL_TAG: tag,
+        DERIVED_COL_HORARIO_ERROR: "",
+    }, index=df.index)
+
+    invalid = ~(dow.notna() & valid_start & valid_stop & tag.notna())
+    if invalid.any():
+        statuses = df.loc[invalid, COL_STATUS] if COL_STATUS in df.columns else [None] * invalid.sum()
+        out.loc[invalid, DERIVED_COLS_HORARIO] = [
+            parse_horario(horario, status)
+            for horario, status in zip(df.loc[invalid, COL_HORARIOS], statuses)
+        ]
+
+    return out.astype({
+        DERIVED_COL_DOW: "int8",
+        DERIVED_COL_START: "int16",
+        DERIVED_COL_STOP: "int16",
+        DERIVED_COL_TAG: "int8",
+    })
+
+
+def horario_columns(sdf: pd.DataFrame) -> pd.DataFrame:
+    """Returns the parsed Horarios columns, computing them only if read() did not."""
+    if all(col in sdf.columns for col in DERIVED_COLS_HORARIO):
+        return sdf[DERIVED_COLS_HORARIO]
+    return parse_horarios(sdf)
 
 
 def com_string(row: Mapping[Any, Any]) -> str:
     return f"{row[COL_FACULTAD]}, {row[COL_CARRERA]}, {row[COL_ASIGNATURA]} - {row[DERIVED_COL_YEAR_TURNO_COM]}"
 
 
-def build_schedule(sdf: pd.DataFrame) -> Schedule:
+def year_turno_com_strings(df: pd.DataFrame) -> pd.Series:
+    """Vectorized equivalent of the DERIVED_COL_YEAR_TURNO_COM format."""
+    return (
+        df[COL_YEAR].astype(str) + " / " 
+        + df[COL_TURNO].astype(str) + " / " 
+        + df[COL_COMISION].astype(str) + " "
+    )
 
-    sch = Schedule()
 
-    for _, row in sdf.iterrows():
+def com_strings(df: pd.DataFrame) -> pd.Series:
+    """Vectorized com_string, using the derived column if read() already computed it."""
+    if DERIVED_COL_COM_STRING in df.columns:
+        return df[DERIVED_COL_COM_STRING]
+    return (
+        df[COL_FACULTAD].astype(str) + ", " 
+        + df[COL_CARRERA].astype(str) + ", " 
+        + df[COL_ASIGNATURA].astype(str) + " - " 
+        + df[DERIVED_COL_YEAR_TURNO_COM].astype(str)
+    )
+
+
+def com_keys(df: pd.DataFrame) -> pd.Series:
+    """Returns a key identifying the commission of each row."""
+    cols = [COL_FACULTAD, COL_CARRERA, COL_ASIGNATURA, COL_YEAR, COL_TURNO, COL_COMISION]
+    out = df[cols[0]].astype(str)
+    for col in cols[1:]:
+        out = out + "\x1f" + df[col].astype(str)
+    return out
+
 
-        dow, event = parse_into_event(row, title_prefix=f"{row[COL_STATUS]} | ")
+def schedule_events(sdf: pd.DataFrame, *, status_prefix: bool = True) -> list[tuple[DOW, ScheduleEvent]]:
+    """Returns one (dow, event) per row of sdf, in row order.
 
+    The title is the com_string of the row, prefixed by the status if status_prefix.
+    """
+    parsed = horario_columns(sdf)
+    titles = com_strings(sdf).astype(str) + parsed[DERIVED_COL_HORARIO_ERROR].astype(str)
+    if status_prefix:
+        titles = sdf[COL_STATUS].astype(str) + " | " + titles
+
+    return [
+        (dow, ScheduleEvent(minutes_to_time(start), minutes_to_time(stop), title, tag))
+        for dow, start, stop, tag, title in zip(
+            parsed[DERIVED_COL_DOW].tolist(),
+            parsed[DERIVED_COL_START].tolist(),
+            parsed[DERIVED_COL_STOP].tolist(),
+            parsed[DERIVED_COL_TAG].tolist(),
+            titles.tolist(),
+        )
+    ]
+
+
+def build_schedule(sdf: pd.DataFrame) -> Schedule:
+
+    sch = Schedule()
+
+    for dow, event in schedule_events(sdf):
         sch.add_event(dow, event)
     
     return sch
 
 
-def read(p: str, *, required_columns: tuple[str] = tuple(), ffill_columns: tuple[str] = tuple()):
-    out = []
-    columns = None
-    import_log = []
-    personas = {}
-    with pd.ExcelFile(p, engine="openpyxl") as fi:
-        for sheet_name in sorted(fi.sheet_names):
-            
-            if sheet_name == "_Personas":
-                df = fi.parse(sheet_name=sheet_name)
-                for col in (COL_NOMBRE, COL_AREA, COL_EMAIL):
-                    if col not in df.columns:
-                        import_log.append(
-                            f"{sheet_name} | No tiene la columna requerida: `{col}"
-                        )
-                        break
-                else:
-                    personas = {
-                        row[COL_NOMBRE]: (row[COL_AREA], row[COL_EMAIL])
-                        for _, row in df.iterrows()
-                    }
-                    import_log.append(
-                        f"_Personas | Se importaron por caso especial {len(df)} filas"
-                    )
-                    continue
-
-            elif sheet_name.startswith("_"):
-                import_log.append(
-                    f"{sheet_name} | Salteando {sheet_name} porque el nombre inicia con _"
-                )
-                continue
-            
-            try:
-                df = fi.parse(sheet_name=sheet_name)
-            except Exception as ex:
-                import_log.append(
-                            f"{sheet_name} | Cannot parse: {ex}"
-                        )
-                continue
-                
-            if df.empty:
-                import_log.append(
-                    f"{sheet_name} | Error al importar, la hoja está vacía"
+class PersonEntry(NamedTuple):
+    rows: np.ndarray
+    schedule: Schedule
+
+
+def build_person_index(df: pd.DataFrame) -> dict[str, PersonEntry]:
+    """Maps each name to its row positions in df and its schedule.
+
+    The events of the whole DataFrame are built once and then
+    distributed by name.
+    """
+    events = schedule_events(df)
+
+    index: dict[str, PersonEntry] = {}
+    for name, rows in df.groupby(COL_NOMBRE, sort=False, observed=True).indices.items():
+        sch = Schedule()
+        for pos in rows:
+            sch.add_event(*events[pos])
+        index[name] = PersonEntry(rows, sch)
+
+    return index
+
+
+def find_overlaps(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns one row per pair of assignments of the same person overlapping in time.
+
+    Uses the sweep of overlapping_intervals (as Schedule.overlapping_pairs)
+    over the events of each person and day, sorted by start. Rows without a
+    name or with an invalid Horarios are ignored.
+    """
+    parsed = horario_columns(df)
+    dows = parsed[DERIVED_COL_DOW].to_numpy()
+    starts = parsed[DERIVED_COL_START].to_numpy()
+    stops = parsed[DERIVED_COL_STOP].to_numpy()
+    codes, _ = pd.factorize(df[COL_NOMBRE])
+
+    valid = (df[COL_NOMBRE] != "").to_numpy() & (parsed[DERIVED_COL_HORARIO_ERROR] == "").to_numpy()
+    positions = np.flatnonzero(valid)
+    positions = positions[np.lexsort((starts[positions], dows[positions], codes[positions]))]
+
+    group_keys = codes[positions].astype(np.int64) * 7 + dows[positions]
+    first, second = [], []
+    for group in np.split(positions, np.flatnonzero(np.diff(group_keys)) + 1):
+        for i, j in overlapping_intervals(starts[group].tolist(), stops[group].tolist()):
+            first.append(group[i])
+            second.append(group[j])
+
+    cols = [COL_FACULTAD, COL_CARRERA, COL_ASIGNATURA, DERIVED_COL_YEAR_TURNO_COM, COL_HORARIOS, COL_STATUS]
+    labels = {DERIVED_COL_YEAR_TURNO_COM: "Año/Turno/Comisión"}
+    df1 = df[cols].iloc[first].rename(columns=labels).reset_index(drop=True)
+    df2 = df[cols].iloc[second].rename(columns=labels).reset_index(drop=True)
+    return pd.concat([
+        pd.DataFrame({
+            COL_NOMBRE: df[COL_NOMBRE].iloc[first].to_numpy(),
+            "Dia": [NUM_2_DOW[dow] for dow in dows[first]],
+        }),
+        df1.add_suffix(" (1)"),
+        df2.add_suffix(" (2)"),
+    ], axis=1)
+
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Converts the COMPACT_CATEGORY_COLUMNS to categoricals and the year to a small int.
+
+    Only text columns are converted. Filtering by equality then compares
+    category codes and every distinct string is stored once.
+    """
+    for col in COMPACT_CATEGORY_COLUMNS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype("category")
+    if COL_YEAR in df.columns and pd.api.types.is_integer_dtype(df[COL_YEAR]):
+        df[COL_YEAR] = pd.to_numeric(df[COL_YEAR], downcast="integer")
+    return df
+
+
+def read(p: Any, *, required_columns: tuple[str] = tuple(), ffill_columns: tuple[str] = tuple(), cache_dir: pathlib.Path | None = import_cache.IMPORT_CACHE_DIR, workers: int = IMPORT_WORKERS, engine: str = excel_reader.EXCEL_ENGINE, compact: bool = COMPACT_STORAGE):
+    """Reads a workbook (path or file-like object) into a normalized DataFrame.
+
+    If cache_dir is given, the result is cached on disk keyed by the hash of the
+    workbook content, so importing an unchanged workbook skips the Excel parsing.
+    With workers > 1, the sheets are parsed in parallel on a process pool.
+    engine selects the Excel reader (see excel_reader.EXCEL_ENGINES) and compact
+    the storage of the columns (see compact_dtypes).
+    """
+    content = import_cache.read_content(p)
+    engine = excel_reader.resolve_engine(engine)
+    key = import_cache.content_key(content, tuple(required_columns), tuple(ffill_columns), engine, compact)
+
+    outdf = import_cache.load(cache_dir, key) if cache_dir else None
+    if outdf is not None:
+        outdf.attrs["import_log"] = outdf.attrs["import_log"] + [
+            f"Cache | Se reutilizó la importación previa de este archivo ({key[:12]})"
+        ]
+    else:
+        outdf = _read_workbook(content, required_columns=required_columns, ffill_columns=ffill_columns, workers=workers, engine=engine)
+        if compact:
+            outdf = compact_dtypes(outdf)
+        if cache_dir:
+            cache_error = import_cache.save(cache_dir, key, outdf)
+            if cache_error:
+                outdf.attrs["import_log"].append(
+                    f"Cache | No se pudo guardar la importación de este archivo, se volverá a procesar: {cache_error}"
                 )
-                continue    
 
-            for col in tuple(required_columns) + tuple(ffill_columns): 
-                if col not in df.columns:
-                    import_log.append(
-                        f"{sheet_name} | Error al importar, no se encontró una columna requerida: {col}"
-                    )
-                continue
+    outdf.attrs["import_datetime"] = datetime.datetime.now(pytz.timezone("America/Argentina/Buenos_Aires")).strftime("%Y-%m-%d %H:%M:%S")
+    return outdf
+
+
+class SheetResult(NamedTuple):
+    """Result of importing a single sheet, independent of the other sheets.
 
-            if columns is None:
-                columns = df.columns
-                import_log.append(
-                    f"{sheet_name} | Definiendo columnas de referencia: {df.columns.to_list()}"
+    columns are the columns to check against the reference (None if the sheet
+    did not get that far). log_before and log_after are the import_log entries
+    before and after that check. personas is only set for a valid _Personas sheet.
+    """
+    columns: pd.Index | None
+    log_before: list[str]
+    log_after: list[str]
+    df: pd.DataFrame | None
+    personas: dict[str, tuple[str, str]] | None = None
+
+    @property
+    def nbytes(self) -> int:
+        return 0 if self.df is None else int(self.df.memory_usage(deep=True).sum())
+
+
+def _read_sheet(fi: pd.ExcelFile | excel_reader.StreamingWorkbook, sheet_name: str, *, required_columns: tuple[str] = tuple(), ffill_columns: tuple[str] = tuple()) -> SheetResult:
+    log_before = []
+    log_after = []
+
+    if sheet_name == "_Personas":
+        df = fi.parse(sheet_name=sheet_name)
+        for col in (COL_NOMBRE, COL_AREA, COL_EMAIL):
+            if col not in df.columns:
+                log_before.append(
+                    f"{sheet_name} | No tiene la columna requerida: `{col}"
                 )
-            elif len(df.columns) != len(columns):
-                import_log.append(
-                    f"{sheet_name} | Error al importar, las columnas no coinciden con la referencia: {df.columns.to_list()}"
+                break
+        else:
+            personas = {
+                row[COL_NOMBRE]: (row[COL_AREA], row[COL_EMAIL])
+                for _, row in df.iterrows()
+            }
+            log_before.append(
+                f"_Personas | Se importaron por caso especial {len(df)} filas"
+            )
+            return SheetResult(None, log_before, log_after, None, personas)
+
+    elif sheet_name.startswith("_"):
+        log_before.append(
+            f"{sheet_name} | Salteando {sheet_name} porque el nombre inicia con _"
+        )
+        return SheetResult(None, log_before, log_after, None)
+    
+    try:
+        df = fi.parse(sheet_name=sheet_name)
+    except Exception as ex:
+        log_before.append(
+                    f"{sheet_name} | Cannot parse: {ex}"
                 )
-                continue
-            elif all(df.columns != columns):
-                import_log.append(
-                    f"{sheet_name} | Error al importar, las columnas no coinciden con la referencia: {df.columns.to_list()}"
+        return SheetResult(None, log_before, log_after, None)
+        
+    if df.empty:
+        log_before.append(
+            f"{sheet_name} | Error al importar, la hoja está vacía"
+        )
+        return SheetResult(None, log_before, log_after, None)
+
+    for col in tuple(required_columns) + tuple(ffill_columns): 
+        if col not in df.columns:
+            log_before.append(
+                f"{sheet_name} | Error al importar, no se encontró una columna requerida: {col}"
+            )
+        continue
+
+    columns = df.columns
+
+    try:
+        nan_columns = df.columns[df.isna().all()].tolist()
+        if nan_columns:
+            log_after.append(
+                f"{sheet_name} | Atención las siguientes columnas no contienen datos: {nan_columns}"
+            )
+
+        for col in ffill_columns:
+            df[col] = df[col].ffill()
+        
+        AS_STR_TYPE = str
+
+        df[COL_NOMBRE] = df[COL_NOMBRE].fillna("").str.strip()
+        df[COL_YEAR] = df[COL_YEAR].astype(int) 
+        df[COL_STATUS] = df[COL_STATUS].astype(AS_STR_TYPE).fillna("").str.strip()
+
+        df[COL_HORA_PRESENCIAL] = df[COL_HORA_PRESENCIAL].fillna(0).astype(AS_STR_TYPE).str.strip().str.replace("0.0", "0")
+        df[COL_HORA_VIRTUAL] = df[COL_HORA_VIRTUAL].fillna(0).astype(AS_STR_TYPE).str.strip().str.replace("0.0", "0")
+        df[COL_OBSERVACIONES] = df[COL_OBSERVACIONES].fillna("").astype(AS_STR_TYPE).str.strip()
+        
+        for col in [COL_CARRERA, COL_ASIGNATURA, COL_TURNO, COL_COMISION]:
+            df[col] = df[col].str.strip()
+
+        df[DERIVED_COL_YEAR_TURNO_COM] = year_turno_com_strings(df)
+
+
+        df.insert(0, "Facultad", sheet_name)
+        if len(df) == 0:
+            log_after.append(
+                f"{sheet_name} | Esta vacio"
+            )
+            return SheetResult(columns, log_before, log_after, None)
+
+        df = df.dropna(how='all')
+
+        if len(df) == 0:
+            log_after.append(
+                f"{sheet_name} | Todos sus registros eran invalidos"
+            )
+            return SheetResult(columns, log_before, log_after, None)
+
+        log_after.append(
+                    f"{sheet_name} | Se importaron {len(df)} filas"
                 )
-                continue
 
-            try:
-                nan_columns = df.columns[df.isna().all()].tolist()
-                if nan_columns:
-                    import_log.append(
-                        f"{sheet_name} | Atención las siguientes columnas no contienen datos: {nan_columns}"
-                    )
+        all_nan_columns_mask = df.isna().all()
 
-                for col in ffill_columns:
-                    df[col] = df[col].ffill()
-                
-                AS_STR_TYPE = str
+        all_nan_column_names = df.columns[all_nan_columns_mask].tolist()
 
-                df[COL_NOMBRE] = df[COL_NOMBRE].fillna("").str.strip()
-                df[COL_YEAR] = df[COL_YEAR].astype(int) 
-                df[COL_STATUS] = df[COL_STATUS].astype(AS_STR_TYPE).fillna("").str.strip()
+        if len(all_nan_column_names) > 0:
+            log_after.append(
+                f"{sheet_name} | Estas columnas no tienen datos {all_nan_column_names}"
+            )
 
-                df[COL_HORA_PRESENCIAL] = df[COL_HORA_PRESENCIAL].fillna(0).astype(AS_STR_TYPE).str.strip().str.replace("0.0", "0")
-                df[COL_HORA_VIRTUAL] = df[COL_HORA_VIRTUAL].fillna(0).astype(AS_STR_TYPE).str.strip().str.replace("0.0", "0")
-                df[COL_OBSERVACIONES] = df[COL_OBSERVACIONES].fillna("").astype(AS_STR_TYPE).str.strip()
-                
-                for col in [COL_CARRERA, COL_ASIGNATURA, COL_TURNO, COL_COMISION]:
-                    df[col] = df[col].str.strip()
+        non_str_columns = [col for col in df.columns if not isinstance(col, str)]
+        if len(non_str_columns) > 0:
+            log_after.append(
+                f"{sheet_name} | Estas columnas no tienen un nombre en formato texto {non_str_columns}"
+            )
+            selected_columns = [col for col in df.columns if isinstance(col, str)]
+            df = df[selected_columns]
 
-                fstring = "{0[%s]} / {0[%s]} / {0[%s]} " % (COL_YEAR, COL_TURNO, COL_COMISION)
-                df[DERIVED_COL_YEAR_TURNO_COM] = df.agg(fstring.format, axis=1)
+        log_after.append(
+            f"{sheet_name} | Columnas a importar {df.columns}"
+        )
 
+        for col in df.columns[df.isna().all()].tolist():
+            df[col] = "Sin datos"
 
-                df.insert(0, "Facultad", sheet_name)
-                if len(df) == 0:
-                    import_log.append(
-                        f"{sheet_name} | Esta vacio"
-                    )
-                    continue
+        return SheetResult(columns, log_before, log_after, df)
+    except Exception as ex:
+        log_after.append(
+                    f"{sheet_name} | {ex}"
+                )
+        return SheetResult(columns, log_before, log_after, None)
 
-                df = df.dropna(how='all')
 
-                if len(df) == 0:
-                    import_log.append(
-                        f"{sheet_name} | Todos sus registros eran invalidos"
-                    )
-                    continue
+def _read_sheet_from_content(content: bytes, sheet_name: str, *, required_columns: tuple[str] = tuple(), ffill_columns: tuple[str] = tuple(), engine: str = excel_reader.EXCEL_ENGINE) -> SheetResult:
+    """Opens the workbook and imports a single sheet (used by the worker processes)."""
+    with excel_reader.open_workbook(content, engine) as fi:
+        return _read_sheet(fi, sheet_name, required_columns=required_columns, ffill_columns=ffill_columns)
 
-                import_log.append(
-                            f"{sheet_name} | Se importaron {len(df)} filas"
-                        )
 
-                all_nan_columns_mask = df.isna().all()
+def _read_sheets(content: bytes, *, required_columns: tuple[str] = tuple(), ffill_columns: tuple[str] = tuple(), workers: int = 1, engine: str = excel_reader.EXCEL_ENGINE) -> dict[str, SheetResult]:
+    """Imports each sheet of the workbook, reusing the sheets that did not change.
 
-                all_nan_column_names = df.columns[all_nan_columns_mask].tolist()
+    Sheets are fingerprinted from the raw xlsx content, and only the ones
+    not found in the sheet cache are parsed. If workers > 1, they are
+    parsed in parallel on a process pool.
+    """
+    engine = excel_reader.resolve_engine(engine)
+    fingerprints = import_cache.sheet_fingerprints(content, tuple(required_columns), tuple(ffill_columns), engine)
 
-                if len(all_nan_column_names) > 0:
-                    import_log.append(
-                        f"{sheet_name} | Estas columnas no tienen datos {all_nan_column_names}"
-                    )
+    results: dict[str, SheetResult] = {}
+    for sheet_name, fingerprint in (fingerprints or {}).items():
+        cached = import_cache.get_sheet(fingerprint)
+        if cached is not None:
+            results[sheet_name] = cached._replace(log_before=cached.log_before + [
+                f"{sheet_name} | Sin cambios, se reutilizó la importación anterior"
+            ])
 
-                non_str_columns = [col for col in df.columns if not isinstance(col, str)]
-                if len(non_str_columns) > 0:
-                    import_log.append(
-                        f"{sheet_name} | Estas columnas no tienen un nombre en formato texto {non_str_columns}"
-                    )
-                    selected_columns = [col for col in df.columns if isinstance(col, str)]
-                    df = df[selected_columns]
+    pending = [sheet_name for sheet_name in (fingerprints or {}) if sheet_name not in results]
 
-                import_log.append(
-                    f"{sheet_name} | Columnas a importar {df.columns}"
+    if fingerprints is not None and workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=POOL_CONTEXT) as executor:
+            futures = {
+                sheet_name: executor.submit(
+                    _read_sheet_from_content, content, sheet_name,
+                    required_columns=required_columns, ffill_columns=ffill_columns, engine=engine,
                 )
+                for sheet_name in pending
+            }
+            for sheet_name, future in futures.items():
+                results[sheet_name] = future.result()
+                import_cache.put_sheet(fingerprints[sheet_name], results[sheet_name], results[sheet_name].nbytes)
+
+    elif fingerprints is None or pending:
+        with excel_reader.open_workbook(content, engine) as fi:
+            for sheet_name in fi.sheet_names:
+                if sheet_name in results:
+                    continue
+                results[sheet_name] = _read_sheet(fi, sheet_name, required_columns=required_columns, ffill_columns=ffill_columns)
+                if fingerprints and sheet_name in fingerprints:
+                    import_cache.put_sheet(fingerprints[sheet_name], results[sheet_name], results[sheet_name].nbytes)
 
-                for col in df.columns[df.isna().all()].tolist():
-                    df[col] = "Sin datos"
+    return results
+
+
+def _read_workbook(content: bytes, *, required_columns: tuple[str] = tuple(), ffill_columns: tuple[str] = tuple(), workers: int = 1, engine: str = excel_reader.EXCEL_ENGINE) -> pd.DataFrame:
+    out = []
+    columns = None
+    import_log = []
+    personas = {}
 
-                out.append(df)
-            except Exception as ex:
-                import_log.append(
-                            f"{sheet_name} | {ex}"
-                        )
+    results = _read_sheets(content, required_columns=required_columns, ffill_columns=ffill_columns, workers=workers, engine=engine)
+    for sheet_name in sorted(results):
+        result = results[sheet_name]
+        import_log.extend(result.log_before)
+
+        if result.personas is not None:
+            personas = result.personas
+            continue
+
+        if result.columns is None:
+            continue
+
+        if columns is None:
+            columns = result.columns
+            import_log.append(
+                f"{sheet_name} | Definiendo columnas de referencia: {result.columns.to_list()}"
+            )
+        elif len(result.columns) != len(columns):
+            import_log.append(
+                f"{sheet_name} | Error al importar, las columnas no coinciden con la referencia: {result.columns.to_list()}"
+            )
+            continue
+        elif all(result.columns != columns):
+            import_log.append(
+                f"{sheet_name} | Error al importar, las columnas no coinciden con la referencia: {result.columns.to_list()}"
+            )
+            continue
+
+        import_log.extend(result.log_after)
+        if result.df is not None:
+            out.append(result.df)
 
     if not out:
         raise Exception("No se encontraron los datos esperados:\n" + "\n-".join(import_log))
@@ -360,14 +829,17 @@ def read(p: str, *, required_columns: tuple[str] = tuple(), ffill_columns: tuple
                 f"Concat | La columna {name} no es un string ({type(name)})"
             )
 
+    outdf[DERIVED_COL_COM_STRING] = com_strings(outdf)
+    outdf[DERIVED_COL_COM_KEY] = com_keys(outdf)
+    outdf[DERIVED_COLS_HORARIO] = parse_horarios(outdf)
+
     outdf.attrs["import_log"] = import_log
-    outdf.attrs["import_datetime"] = datetime.datetime.now(pytz.timezone("America/Argentina/Buenos_Aires")).strftime("%Y-%m-%d %H:%M:%S")
     outdf.attrs["personas"] = personas
     return outdf
 
 
 
-def read_into_session(content, **attrs: str):
+def _load_dataset(content: bytes, attrs: dict[str, str]) -> Dataset:
     try:
         df = read(
                     content,
@@ -378,73 +850,365 @@ def read_into_session(content, **attrs: str):
         err = str(ex).replace("File is not a zip file", "Formato desconocido")    
         raise Exception(err)
     
-    st.cache_data.clear()
-    
     for k, v in attrs.items():
         df.attrs[k] = v
 
-    st.session_state.df = df
-    st.session_state.schedule_by_name = {}
+    from availability import build_availability
+    from occupancy import build_occupancy_cube
+
+    return Dataset(df, build_person_index(df), build_availability(df), build_occupancy_cube(df))
+
+
+def read_into_session(content, **attrs: str):
+    """Imports a workbook into the session.
+
+    The dataset is shared with every session that imports the same content
+    from the same url (see dataset_registry), so it must not be modified.
+    """
+    content = import_cache.read_content(content)
+    key = (attrs.get("url", ""), import_cache.content_key(content))
+
+    lease = REGISTRY.acquire(key, lambda: _load_dataset(content, attrs))
+
+    st.session_state.dataset_lease = lease
+    st.session_state.df = lease.dataset.df
+    st.session_state.person_index = lease.dataset.person_index
+    st.session_state.availability = lease.dataset.availability
+    st.session_state.occupancy = lease.dataset.occupancy
     
 
+@cache
+def http_session() -> requests.Session:
+    """Process-wide session, so connections to the same host are reused."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def size_text(nbytes: int) -> str:
+    """Returns a size in MB, or in KB if it is under 1 MB."""
+    if nbytes >= 1024 * 1024:
+        return f"{nbytes / 1024 / 1024:.3g} MB"
+    return f"{nbytes / 1024:.3g} KB"
+
+
+def stream_to_file(response: requests.Response, *, max_bytes: int = DOWNLOAD_MAX_BYTES, progress: Callable[[int, int | None], None] | None = None) -> tempfile.SpooledTemporaryFile:
+    """Writes the body of a streamed response into a spooled temporary file.
+
+    Raises if the body is larger than max_bytes. progress is called with the
+    bytes read so far and the total size (None if unknown) after each chunk.
+    """
+    total = int(response.headers.get("Content-Length", 0)) or None
+    if total is not None and total > max_bytes:
+        raise Exception(f"El archivo supera el tamaño máximo ({size_text(max_bytes)})")
+
+    out = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_BYTES)
+    done = 0
+    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+        done += len(chunk)
+        if done > max_bytes:
+            out.close()
+            raise Exception(f"El archivo supera el tamaño máximo ({size_text(max_bytes)})")
+        out.write(chunk)
+        if progress:
+            progress(done, total)
+
+    out.seek(0)
+    return out
+
+
 def download(url: str):
-    with st.spinner(f'Downloading {url}'):
-        download_url = url.split("?")[0] + "?download=1"
+    """Downloads the workbook at url and imports it into the session.
 
-        response = requests.get(download_url, stream=True)
+    If the session already holds this url, the request is conditional and
+    a 304 (not modified) response keeps the current data.
+    """
+    download_url = url.split("?")[0] + "?download=1"
 
-        if response.status_code != 200:
-            st.error(f"No se pudo bajar el archivo (status code {response.status_code})")
-        else:
-            read_into_session(io.BytesIO(response.content), url=url)  
-
-def generate_schedule_image(sch: Schedule, buffer: io.BytesIO):
-    config = data.CalendarConfig(
-        lang='es',
-        title='Horario',
-        dates='Lu - Do',
-        hours='7 - 23',
-        legend=True,
-        show_date=False,
-        show_year=False,
+    headers = {}
+    if "df" in st.session_state and st.session_state.df.attrs.get("url") == url:
+        if etag := st.session_state.df.attrs.get("etag"):
+            headers["If-None-Match"] = etag
+        if last_modified := st.session_state.df.attrs.get("last_modified"):
+            headers["If-Modified-Since"] = last_modified
+
+    with st.spinner(f'Downloading {url}'):
+        bar = st.progress(0.0)
+
+        def _progress(done: int, total: int | None):
+            if total:
+                bar.progress(min(done / total, 1.0), text=f"{done // 1024} de {total // 1024} KB")
+            else:
+                bar.progress(0.0, text=f"{done // 1024} KB")
+
+        with http_session().get(download_url, stream=True, headers=headers, timeout=DOWNLOAD_TIMEOUT) as response:
+            if response.status_code == 304:
+                bar.empty()
+                st.info("El archivo no cambió desde la última importación.")
+                return
+
+            if response.status_code != 200:
+                bar.empty()
+                st.error(f"No se pudo bajar el archivo (status code {response.status_code})")
+                return
+
+            with stream_to_file(response, progress=_progress) as content:
+                read_into_session(
+                    content, 
+                    url=url, 
+                    etag=response.headers.get("ETag", ""), 
+                    last_modified=response.headers.get("Last-Modified", ""),
+                )
+
+        bar.empty()
+
+SCHEDULE_IMAGE_CONFIG = (
+    ("lang", "es"),
+    ("title", "Horario"),
+    ("dates", "Lu - Do"),
+    ("hours", "7 - 23"),
+    ("legend", True),
+    ("show_date", False),
+    ("show_year", False),
+)
+
+# Number of rendered schedules kept in memory.
+RENDER_CACHE_SIZE = 256
+
+# Number of processes used by render_schedules (1 is sequential).
+RENDER_WORKERS = int(os.environ.get("ACAD_RENDER_WORKERS", "1"))
+
+# Tables with more rows are shown in pages (see show_table).
+TABLE_PAGE_SIZE = 1000
+
+# "png" (calendar_view) or "svg" (render_schedule_svg), see render_schedule.
+SCHEDULE_RENDERER = os.environ.get("ACAD_SCHEDULE_RENDERER", "png")
+
+# Layout of the SVG schedule, in pixels.
+SVG_FIRST_HOUR = 7
+SVG_LAST_HOUR = 23
+SVG_HOUR_HEIGHT = 40
+SVG_DAY_WIDTH = 130
+SVG_HOURS_WIDTH = 45
+SVG_TITLE_HEIGHT = 40
+SVG_DAYS_HEIGHT = 25
+SVG_FONT_SIZE = 11
+SVG_DAY_NAMES = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+
+def schedule_key(sch: Schedule) -> tuple[tuple[DOW, ScheduleEvent], ...]:
+    """Returns the events of the schedule as a hashable key for render_schedule_png."""
+    return tuple(
+        (dow, ev) 
+        for dow, sch_events in sorted(sch.items()) 
+        for ev in sch_events
     )
+
+
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_schedule_png(events: tuple[tuple[DOW, ScheduleEvent], ...], config: tuple[tuple[str, Any], ...] = SCHEDULE_IMAGE_CONFIG) -> bytes:
+    """Renders the events with calendar_view and returns the PNG bytes.
+
+    Results are cached by events and config, as the same schedules
+    are rendered again on every rerun of a page.
+    """
+    config = data.CalendarConfig(**dict(config))
     data.validate_config(config)
 
     calendar = Calendar.build(config)
 
-    events: list[Event] = []
-    for dow, sch_events in sorted(sch.items()):
-        for ev in sch_events:
-            events.append(
-                Event(
-                day_of_week=dow,
-                start=ev.start.strftime("%H:%M"), 
-                end=ev.stop.strftime("%H:%M"), 
-                title=ev.title, 
-                style=TAG_TO_STYLE[ev.tag]
-                )
+    calendar_events: list[Event] = []
+    for dow, ev in events:
+        calendar_events.append(
+            Event(
+            day_of_week=dow,
+            start=ev.start.strftime("%H:%M"), 
+            end=ev.stop.strftime("%H:%M"), 
+            title=ev.title, 
+            style=TAG_TO_STYLE[ev.tag]
             )
+        )
 
-    data.validate_events(events, config)
+    data.validate_events(calendar_events, config)
 
-    calendar.add_events(events)
+    calendar.add_events(calendar_events)
 
+    buffer = io.BytesIO()
     calendar.save(buffer)
+    return buffer.getvalue()
+
+
+def _svg_color(rgba: tuple[int, int, int, int]) -> str:
+    r, g, b, a = rgba
+    return f"rgba({r},{g},{b},{a / 255:.2f})"
+
+
+def _cascade(events: list[ScheduleEvent]) -> list[tuple[int, int]]:
+    """Returns (column, number of columns) for events of a day sorted by start,
+    so that overlapping events are drawn side by side.
+    """
+    out: list[tuple[int, int]] = []
+    group_start = 0
+    group_stop = -1
+    column_stops: list[int] = []
+    for ndx, ev in enumerate(events):
+        if ev.start_minutes >= group_stop:
+            for j in range(group_start, ndx):
+                out[j] = (out[j][0], len(column_stops))
+            group_start = ndx
+            column_stops = []
+        for column, column_stop in enumerate(column_stops):
+            if column_stop <= ev.start_minutes:
+                column_stops[column] = ev.stop_minutes
+                break
+        else:
+            column = len(column_stops)
+            column_stops.append(ev.stop_minutes)
+        out.append((column, 0))
+        group_stop = max(group_stop, ev.stop_minutes)
+
+    for j in range(group_start, len(events)):
+        out[j] = (out[j][0], len(column_stops))
+    return out
+
+
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_schedule_svg(events: tuple[tuple[DOW, ScheduleEvent], ...], title: str = "Horario") -> str:
+    """Renders the events as an SVG weekly grid with the layout and colors of render_schedule_png.
+
+    Events are clipped to SVG_FIRST_HOUR - SVG_LAST_HOUR.
+    """
+    first = SVG_FIRST_HOUR * 60
+    last = SVG_LAST_HOUR * 60
+    top = SVG_TITLE_HEIGHT + SVG_DAYS_HEIGHT
+    width = SVG_HOURS_WIDTH + 7 * SVG_DAY_WIDTH
+    height = top + (SVG_LAST_HOUR - SVG_FIRST_HOUR) * SVG_HOUR_HEIGHT + 1
+
+    def y(minutes: int) -> float:
+        return top + (minutes - first) * SVG_HOUR_HEIGHT / 60
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="{SVG_FONT_SIZE}">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+        f'<text x="{width / 2}" y="{SVG_TITLE_HEIGHT * 0.7}" font-size="20" text-anchor="middle">{html.escape(title)}</text>',
+    ]
+
+    for hour in range(SVG_FIRST_HOUR, SVG_LAST_HOUR + 1):
+        hy = y(hour * 60)
+        parts.append(f'<line x1="{SVG_HOURS_WIDTH}" y1="{hy}" x2="{width}" y2="{hy}" stroke="#b4b4b4" stroke-width="0.5"/>')
+        parts.append(f'<text x="{SVG_HOURS_WIDTH - 5}" y="{hy + 4}" text-anchor="end">{hour:02d}:00</text>')
+
+    for dow, name in enumerate(SVG_DAY_NAMES):
+        dx = SVG_HOURS_WIDTH + dow * SVG_DAY_WIDTH
+        parts.append(f'<line x1="{dx}" y1="{SVG_TITLE_HEIGHT}" x2="{dx}" y2="{height}" stroke="#969696"/>')
+        parts.append(f'<text x="{dx + SVG_DAY_WIDTH / 2}" y="{top - 8}" font-size="13" text-anchor="middle">{name}</text>')
+
+    by_dow: defaultdict[DOW, list[ScheduleEvent]] = defaultdict(list)
+    for dow, ev in events:
+        by_dow[dow].append(ev)
+
+    for dow, day_events in by_dow.items():
+        day_events.sort(key=lambda ev: (ev.start_minutes, ev.stop_minutes))
+        for ev, (column, columns) in zip(day_events, _cascade(day_events)):
+            start = max(ev.start_minutes, first)
+            stop = min(ev.stop_minutes, last)
+            if stop <= start:
+                continue
+
+            event_width = (SVG_DAY_WIDTH - 4) / columns
+            ex = SVG_HOURS_WIDTH + dow * SVG_DAY_WIDTH + 2 + column * event_width
+            ey = y(start)
+            event_height = y(stop) - ey
+            event_style = TAG_TO_STYLE[ev.tag]
+
+            lines = textwrap.wrap(ev.title, max(1, int(event_width / (SVG_FONT_SIZE * 0.55))))
+            text = "".join(
+                f'<tspan x="3" dy="{SVG_FONT_SIZE + 1}">{html.escape(line)}</tspan>' for line in lines
+            )
+            parts.append(
+                f'<svg x="{ex:.1f}" y="{ey:.1f}" width="{event_width:.1f}" height="{event_height:.1f}">'
+                f'<title>{html.escape(ev.title)} ({ev.start:%H:%M} - {ev.stop:%H:%M})</title>'
+                f'<rect x="0.5" y="0.5" width="{event_width - 1:.1f}" height="{event_height - 1:.1f}" rx="2" '
+                f'fill="{_svg_color(event_style.event_fill)}" stroke="{_svg_color(event_style.event_border)}"/>'
+                f'<text y="1">{text}</text>'
+                f'</svg>'
+            )
+
+    parts.append("</svg>")
+    return "".join(parts)
 
 
-def person_view(sdf: pd.DataFrame, options: list[Any], schedule_by_name: dict[str, Schedule], calendar_buffer: io.BytesIO, append_schedule: Schedule | None = None):
+def generate_schedule_image(sch: Schedule) -> bytes:
+    """Returns the schedule rendered as PNG.
+
+    The bytes are shared with the render cache and must not be modified.
+    """
+    return render_schedule_png(schedule_key(sch))
+
+
+def _render_schedule_png_or_none(events: tuple[tuple[DOW, ScheduleEvent], ...]) -> bytes | None:
+    try:
+        return render_schedule_png(events)
+    except Exception:
+        return None
+
+
+def render_schedules(schedules: Mapping[str, Schedule], *, workers: int = RENDER_WORKERS, progress: Callable[[int, int], None] | None = None) -> dict[str, bytes | None]:
+    """Renders many schedules as PNG, on a process pool if workers > 1.
+
+    Identical schedules are rendered once. Schedules that cannot be
+    rendered map to None. progress is called with (done, total).
+    """
+    keys = {name: schedule_key(sch) for name, sch in schedules.items()}
+    unique = list(dict.fromkeys(keys.values()))
+    total = len(unique)
+
+    images: dict[tuple[tuple[DOW, ScheduleEvent], ...], bytes | None] = {}
+    if workers > 1 and total > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, total), mp_context=POOL_CONTEXT) as executor:
+            futures = {executor.submit(_render_schedule_png_or_none, key): key for key in unique}
+            for future in as_completed(futures):
+                images[futures[future]] = future.result()
+                if progress:
+                    progress(len(images), total)
+    else:
+        for key in unique:
+            images[key] = _render_schedule_png_or_none(key)
+            if progress:
+                progress(len(images), total)
+
+    return {name: images[key] for name, key in keys.items()}
+
+
+def render_schedule(sch: Schedule, renderer: str = SCHEDULE_RENDERER) -> bytes | str:
+    """Returns the schedule as PNG bytes or as an SVG string, both can be passed to st.image."""
+    if renderer == "svg":
+        return render_schedule_svg(schedule_key(sch))
+    if renderer == "png":
+        return generate_schedule_image(sch)
+    raise ValueError(f"Unknown schedule renderer {renderer}, expected png or svg")
+
+
+def person_view(sdf: pd.DataFrame, options: list[Any], person_index: dict[str, PersonEntry], append_schedule: Schedule | None = None):
+    """Shows the schedule and assignments of the selected person.
+
+    person_index must have been built from sdf (see build_person_index).
+    """
     selected_name = st.selectbox(
         f'Docente ({len(options)})',
         options=options, 
         index=0
     )
 
-    filtered_df = sdf[sdf[COL_NOMBRE] == selected_name]
-    
-    if selected_name in schedule_by_name:
-        sch = schedule_by_name[selected_name]
+    if selected_name in person_index:
+        rows, sch = person_index[selected_name]
+        filtered_df = sdf.iloc[rows]
     else:
-        schedule_by_name[selected_name] = sch = build_schedule(filtered_df)
+        filtered_df = sdf.iloc[[]]
+        sch = Schedule()
 
     elements = st.container()
 
@@ -457,9 +1221,9 @@ def person_view(sdf: pd.DataFrame, options: list[Any], schedule_by_name: dict[st
             for dow, evs in append_schedule.items():
                 for ev in evs:
                     new_sch.add_event(dow, ev)
-            generate_schedule_image(new_sch, calendar_buffer)
+            calendar_image = render_schedule(new_sch)
         else:
-            generate_schedule_image(sch, calendar_buffer)
+            calendar_image = render_schedule(sch)
                 
         calendar_err = ""
     except Exception as ex:
@@ -469,20 +1233,10 @@ def person_view(sdf: pd.DataFrame, options: list[Any], schedule_by_name: dict[st
         if calendar_err:
             st.error(calendar_err)
         else:
-            st.image(calendar_buffer)        
+            st.image(calendar_image)        
     
         try:
-            column_config = {col: None for col in sdf.columns if col.startswith("_")}
-        except Exception as ex:
-            st.error(f"No se pudo filtrar las columnas: {ex}.\n{sdf.columns}")
-
-        try:
-            st.dataframe(
-                df_to_records(filtered_df),
-                width='stretch', height=300,  
-                hide_index=True,
-                column_config=column_config
-            )
+            show_table(filtered_df)
         except Exception as ex:
             st.error(f"No se pudo mostrar la tabla. {ex}")
 
@@ -492,8 +1246,26 @@ def person_view(sdf: pd.DataFrame, options: list[Any], schedule_by_name: dict[st
 
     return elements
 
-def df_to_records(df: pd.DataFrame) -> list[dict[str, Any]]:
-    return [
-        row.to_dict()
-        for _ndx, row in df.iterrows()
-    ]
\ No newline at end of file
+def show_table(df: pd.DataFrame, *, height: int = 300, page_size: int = TABLE_PAGE_SIZE, key: str | None = None):
+    """Shows the DataFrame without the derived (_) columns, a page at a time if it is large.
+
+    key must be given when more than one table is shown on a page.
+    """
+    view = df[[col for col in df.columns if not str(col).startswith("_")]]
+
+    pages = max(1, -(-len(view) // page_size))
+    if pages > 1:
+        page = st.number_input(
+            f"Página (de {pages})", min_value=1, max_value=pages, value=1,
+            key=None if key is None else f"{key}_page",
+        )
+        start = (page - 1) * page_size
+        view = view.iloc[start:start + page_size]
+        st.caption(f"Filas {start + 1} a {start + len(view)} de {len(df)}")
+
+    st.dataframe(
+        view,
+        width='stretch', height=height,
+        hide_index=True,
+        key=key,
+    )
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""Process-wide registry of imported workbooks shared by all the sessions."""
+
+import collections
+import os
+import threading
+import weakref
+from typing import Any, Callable, Hashable, NamedTuple
+
+import pandas as pd
+
+REGISTRY_MAX_BYTES = int(os.environ.get("ACAD_REGISTRY_MAX_MB", "1024")) * 1024 * 1024
+
+
+class Dataset(NamedTuple):
+    """An imported workbook with its derived indexes.
+
+    It is shared between sessions, so it must not be modified.
+    """
+    df: pd.DataFrame
+    person_index: dict[str, Any]
+    availability: Any
+    occupancy: Any
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            int(self.df.memory_usage(deep=True).sum()) 
+            + self.availability.busy.nbytes 
+            + self.availability.events.nbytes
+            + self.occupancy.counts.nbytes
+        )
+
+
+class Lease:
+    """Keeps a dataset of the registry alive until the lease is garbage collected.
+
+    Store it in the session state: when it is replaced or the session ends,
+    the reference is released.
+    """
+
+    def __init__(self, registry: "DatasetRegistry", key: Hashable, dataset: Dataset):
+        self.key = key
+        self.dataset = dataset
+        weakref.finalize(self, registry.release, key)
+
+
+class DatasetRegistry:
+    """Reference-counted datasets with LRU eviction of the unreferenced ones.
+
+    Datasets in use are never evicted, so the memory cap can be exceeded
+    while many different workbooks are open.
+    """
+
+    def __init__(self, max_bytes: int = REGISTRY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._datasets: collections.OrderedDict[Hashable, Dataset] = collections.OrderedDict()
+        self._refs: collections.Counter[Hashable] = collections.Counter()
+        self._sizes: dict[Hashable, int] = {}
+        self._loading: dict[Hashable, threading.Lock] = {}
+
+    def acquire(self, key: Hashable, load: Callable[[], Dataset]) -> Lease:
+        """Returns a lease on the dataset for key, calling load only if it is not registered.
+
+        Concurrent calls for the same key load it once.
+        """
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                dataset = self._datasets.get(key)
+
+            try:
+                size = None
+                if dataset is None:
+                    dataset = load()
+                    size = dataset.nbytes
+
+                with self._lock:
+                    if key not in self._datasets:
+                        self._datasets[key] = dataset
+                        self._sizes[key] = dataset.nbytes if size is None else size
+                    self._datasets.move_to_end(key)
+                    self._refs[key] += 1
+                    self._evict()
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+
+        return Lease(self, key, dataset)
+
+    def release(self, key: Hashable):
+        with self._lock:
+            self._refs[key] -= 1
+            if self._refs[key] <= 0:
+                del self._refs[key]
+            self._evict()
+
+    def _evict(self):
+        total = sum(self._sizes.values())
+        for key in list(self._datasets):
+            if total <= self.max_bytes:
+                break
+            if self._refs[key] > 0:
+                continue
+            del self._datasets[key]
+            total -= self._sizes.pop(key)
+
+    def __len__(self) -> int:
+        return len(self._datasets)
+
+
+REGISTRY = DatasetRegistry()
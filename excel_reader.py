@@ -0,0 +1,102 @@
+"""Readers for the sheets of an xlsx workbook.
+
+Every reader exposes sheet_names and parse(sheet_name) like pd.ExcelFile
+and can be used as a context manager.
+"""
+
+import importlib.util
+import io
+import os
+
+import openpyxl
+import pandas as pd
+from openpyxl.cell.cell import ERROR_CODES
+from pandas.io.parsers import TextParser
+
+# "auto" picks the fastest installed engine.
+EXCEL_ENGINES = ("auto", "calamine", "openpyxl-stream", "openpyxl")
+
+EXCEL_ENGINE = os.environ.get("ACAD_EXCEL_ENGINE", "auto")
+
+
+def resolve_engine(engine: str) -> str:
+    if engine not in EXCEL_ENGINES:
+        raise ValueError(f"Unknown excel engine {engine}, expected one of {EXCEL_ENGINES}")
+    if engine != "auto":
+        return engine
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return "openpyxl-stream"
+
+
+class StreamingWorkbook:
+    """Reads sheets with openpyxl in read-only mode iterating over values only.
+
+    Cells are converted as pandas' openpyxl reader does, so parse returns
+    the same DataFrame as pd.ExcelFile(..., engine="openpyxl").parse
+    without building a cell object per value.
+    """
+
+    def __init__(self, content: bytes):
+        self.book = openpyxl.load_workbook(
+            io.BytesIO(content), read_only=True, data_only=True, keep_links=False
+        )
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return self.book.sheetnames
+
+    @staticmethod
+    def _convert(value):
+        if value is None:
+            return ""
+        if isinstance(value, float):
+            if value.is_integer():
+                return int(value)
+            return value
+        if isinstance(value, str) and value in ERROR_CODES:
+            return float("nan")
+        return value
+
+    def get_sheet_data(self, sheet_name: str) -> list[list]:
+        sheet = self.book[sheet_name]
+        sheet.reset_dimensions()
+
+        convert = self._convert
+        data = []
+        last_row_with_data = -1
+        for row_number, row in enumerate(sheet.iter_rows(values_only=True)):
+            converted_row = [convert(value) for value in row]
+            while converted_row and converted_row[-1] == "":
+                converted_row.pop()
+            if converted_row:
+                last_row_with_data = row_number
+            data.append(converted_row)
+
+        data = data[: last_row_with_data + 1]
+        if data:
+            width = max(len(row) for row in data)
+            data = [row + [""] * (width - len(row)) for row in data]
+        return data
+
+    def parse(self, sheet_name: str) -> pd.DataFrame:
+        data = self.get_sheet_data(sheet_name)
+        if not data:
+            return pd.DataFrame()
+        return TextParser(data, header=0, skip_blank_lines=False).read()
+
+    def close(self):
+        self.book.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def open_workbook(content: bytes, engine: str = EXCEL_ENGINE) -> pd.ExcelFile | StreamingWorkbook:
+    engine = resolve_engine(engine)
+    if engine == "openpyxl-stream":
+        return StreamingWorkbook(content)
+    return pd.ExcelFile(io.BytesIO(content), engine=engine)
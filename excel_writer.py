@@ -0,0 +1,79 @@
+"""Writers of xlsx workbooks from DataFrames.
+
+Every writer produces the same cells as DataFrame.to_excel(index=False).
+"""
+
+import importlib.util
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+# "auto" picks the fastest installed writer.
+EXCEL_WRITERS = ("auto", "xlsxwriter", "openpyxl")
+
+EXCEL_WRITER = os.environ.get("ACAD_EXCEL_WRITER", "auto")
+
+# Same style as the header written by pandas.
+HEADER_FORMAT = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+
+
+def resolve_writer(writer: str) -> str:
+    if writer not in EXCEL_WRITERS:
+        raise ValueError(f"Unknown excel writer {writer}, expected one of {EXCEL_WRITERS}")
+    if writer != "auto":
+        return writer
+    if importlib.util.find_spec("xlsxwriter") is not None:
+        return "xlsxwriter"
+    return "openpyxl"
+
+
+def _write_openpyxl(buff: io.BytesIO, sheetname_2_df: dict[str, pd.DataFrame]):
+    with pd.ExcelWriter(buff, engine="openpyxl") as writer:
+        for sheet_name, sheet_df in sheetname_2_df.items():
+            sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def _column_values(col: pd.Series) -> list:
+    """Returns the values of a column as written by pandas: missing as blank, infinite as text."""
+    values = col.astype(object).where(col.notna(), None)
+    if col.dtype.kind == "f":
+        data = col.to_numpy()
+        values = values.where(~np.isinf(data), np.where(data > 0, "inf", "-inf"))
+    return values.tolist()
+
+
+def _write_xlsxwriter(buff: io.BytesIO, sheetname_2_df: dict[str, pd.DataFrame]):
+    """Writes row by row with xlsxwriter in constant memory mode.
+
+    pandas writes the cells column by column, which constant memory mode
+    does not support (only the last row would be kept).
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(buff, {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+    })
+    header_format = workbook.add_format(HEADER_FORMAT)
+    try:
+        for sheet_name, sheet_df in sheetname_2_df.items():
+            worksheet = workbook.add_worksheet(sheet_name)
+            worksheet.write_row(0, 0, [str(col) for col in sheet_df.columns], header_format)
+
+            columns = [_column_values(col) for _, col in sheet_df.items()]
+            for row_number, row in enumerate(zip(*columns), 1):
+                worksheet.write_row(row_number, 0, row)
+    finally:
+        workbook.close()
+
+
+def write_workbook(sheetname_2_df: dict[str, pd.DataFrame], writer: str = EXCEL_WRITER) -> bytes:
+    """Returns the content of an xlsx workbook with a sheet per DataFrame."""
+    buff = io.BytesIO()
+    if resolve_writer(writer) == "xlsxwriter":
+        _write_xlsxwriter(buff, sheetname_2_df)
+    else:
+        _write_openpyxl(buff, sheetname_2_df)
+    return buff.getvalue()
@@ -1,13 +1,28 @@
-from typing import TypedDict
+from typing import Iterable, Iterator, TypedDict
 import unicodedata
 import streamlit as st
 import pandas as pd
 import re
 import io
-from collections import defaultdict
+import datetime
+import os
+import tempfile
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 import zipfile
 
-from common import COL_NOMBRE, COL_ASIGNATURA, COL_CARRERA, COL_COMISION, COL_FACULTAD, COL_HORARIOS, COL_TURNO, COL_YEAR, COL_STATUS, COL_HORA_VIRTUAL, COL_OBSERVACIONES, COL_HORA_PRESENCIAL, parse_min
+import excel_writer
+from common import COL_NOMBRE, COL_ASIGNATURA, COL_CARRERA, COL_COMISION, COL_FACULTAD, COL_HORARIOS, COL_TURNO, COL_YEAR, COL_STATUS, COL_HORA_VIRTUAL, COL_OBSERVACIONES, COL_HORA_PRESENCIAL, parse_min_series, build_person_index, render_schedules, POOL_CONTEXT
+
+# Number of processes used to generate the workbooks of an export (1 is sequential).
+EXPORT_WORKERS = int(os.environ.get("ACAD_EXPORT_WORKERS", "1"))
+
+# Bounds of the cache of generated downloads, each one can hold a whole ZIP.
+EXPORT_CACHE_MAX_ENTRIES = 4
+EXPORT_CACHE_TTL = datetime.timedelta(hours=1)
+
+# Archives larger than this are spooled to disk while they are written.
+ZIP_SPOOL_BYTES = 16 * 1024 * 1024
 
 class Download(TypedDict):
     data: bytes
@@ -33,19 +48,68 @@ def create_zip_in_memory(files: dict[str, bytes]) -> bytes:
     return zip_buffer.getvalue()
 
 
-def generate_excel_content(sheetname_2_df: dict[str, pd.DataFrame]) -> bytes:
-    buff = io.BytesIO()
-    with pd.ExcelWriter(buff, engine="openpyxl") as writer:
-        for sheet_name, sheet_df in sheetname_2_df.items():
-            sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+def write_zip(files: Iterable[tuple[str, bytes]]) -> tempfile.SpooledTemporaryFile:
+    """Writes (filename, content) pairs as they come into a ZIP spooled to a temporary file."""
+    out = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_BYTES)
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for filename, file_content in files:
+            zipf.writestr(filename, file_content)
 
-    buff.seek(0)
-    return buff.getvalue()
+    out.seek(0)
+    return out
 
 
-@st.cache_data
-def converte_dfs_to_excel(sheet_2_df: dict[str, pd.DataFrame], filename_column: str, *, mail_mapping: dict[str, tuple[str, str]] | None = None, zip_stem: str = "archivo") -> Download:
-    
+def generate_excel_content(sheetname_2_df: dict[str, pd.DataFrame], writer: str = excel_writer.EXCEL_WRITER) -> bytes:
+    return excel_writer.write_workbook(sheetname_2_df, writer)
+
+
+def generate_excel_contents(workbooks: Iterable[tuple[str, dict[str, pd.DataFrame]]], *, workers: int = EXPORT_WORKERS) -> Iterator[tuple[str, bytes]]:
+    """Yields (filename, content) for every workbook, in order.
+
+    If workers > 1, workbooks are generated on a process pool keeping
+    at most two per process pending, so only a few are in memory.
+    """
+    if workers <= 1:
+        for filename, sheetname_2_df in workbooks:
+            yield filename, generate_excel_content(sheetname_2_df)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT) as executor:
+        pending = deque()
+        for filename, sheetname_2_df in workbooks:
+            pending.append((filename, executor.submit(generate_excel_content, sheetname_2_df)))
+            if len(pending) >= 2 * workers:
+                filename, future = pending.popleft()
+                yield filename, future.result()
+
+        while pending:
+            filename, future = pending.popleft()
+            yield filename, future.result()
+
+
+def render_calendars(sdf: pd.DataFrame) -> dict[str, bytes | None]:
+    """Renders the schedule of every person in sdf, showing a progress bar."""
+    schedules = {nombre: entry.schedule for nombre, entry in build_person_index(sdf).items()}
+
+    bar = st.progress(0.0, text="Generando horarios")
+
+    def _progress(done: int, total: int):
+        bar.progress(done / total, text=f"Generando horarios ({done} de {total})")
+
+    images = render_schedules(schedules, progress=_progress)
+    bar.empty()
+    return images
+
+
+@st.cache_data(max_entries=EXPORT_CACHE_MAX_ENTRIES, ttl=EXPORT_CACHE_TTL)
+def converte_dfs_to_excel(sheet_2_df: dict[str, pd.DataFrame], filename_column: str, *, mail_mapping: dict[str, tuple[str, str]] | None = None, zip_stem: str = "archivo", calendars_df: pd.DataFrame | None = None) -> Download:
+    """Generates an Excel file per value of filename_column (zipped if more than one).
+
+    If calendars_df is given, the schedule of every person in it is rendered
+    and added as a PNG next to their file. The rows are the cache key, not the
+    images, so a cached download is not rendered again.
+    """
+
     nombres: set[str] = set()
     for sheet_df in sheet_2_df.values():
         nombres.update(sheet_df[filename_column].unique())
@@ -69,24 +133,39 @@ def converte_dfs_to_excel(sheet_2_df: dict[str, pd.DataFrame], filename_column:
             mails[nombre] = ""
 
 
-    files: dict[str, bytes] = {}
+    # Split every sheet once instead of filtering it for each name.
+    groups: dict[str, dict[str, pd.DataFrame]] = {
+        sheet_name: dict(iter(sheet_df.groupby(filename_column, sort=False, observed=True)))
+        for sheet_name, sheet_df in sheet_2_df.items()
+    }
 
-    for nombre in sorted(nombres):
+    def _workbooks() -> Iterator[tuple[str, dict[str, pd.DataFrame]]]:
+        for nombre in sorted(nombres):
+            yield filenames[nombre], {
+                sheet_name: groups[sheet_name].get(nombre, sheet_df.iloc[:0])
+                for sheet_name, sheet_df in sheet_2_df.items()
+            }
 
-        files[filenames[nombre]] = generate_excel_content({
-            sheet_name: sheet_df[sheet_df[filename_column] == nombre]
-            for sheet_name, sheet_df in sheet_2_df.items()
-            })
+    calendars = render_calendars(calendars_df) if calendars_df is not None else {}
 
     # Solo exportar el listado completo si hay mas de una persona
-    if len(nombres) == 1:
-        nombre = nombres.pop()
+    if len(nombres) == 1 and not calendars:
+        filename, sheetname_2_df = next(_workbooks())
         return {
-                "data": files[filenames[nombre]],
-                "file_name": filenames[nombre],
+                "data": generate_excel_content(sheetname_2_df),
+                "file_name": filename,
                 "mime": "application/vnd.ms-excel",
         }
 
+    # Contar horas
+    hours: dict[str, pd.Series] = {}
+    for sheet_name, sheet_df in sheet_2_df.items():
+        minutes = (
+            parse_min_series(sheet_df[COL_HORA_PRESENCIAL]).fillna(0) 
+            + parse_min_series(sheet_df[COL_HORA_VIRTUAL]).fillna(0)
+        )
+        hours[sheet_name] = minutes.groupby(sheet_df[filename_column], sort=False, observed=True).sum()
+
     user_records = []
     user_hour_records = []
 
@@ -98,22 +177,10 @@ def converte_dfs_to_excel(sheet_2_df: dict[str, pd.DataFrame], filename_column:
             "mail": mails[nombre],
         })
 
-        # Contar horas
-        hours_per_group = {}
-        for sheet_name, sheet_df in sheet_2_df.items():
-            seldf = sheet_df[sheet_df[filename_column] == nombre]
-            count = 0
-            for _, row in seldf.iterrows():
-                try:
-                    count += parse_min(row[COL_HORA_PRESENCIAL])
-                except Exception:
-                    pass
-                try:
-                    count += parse_min(row[COL_HORA_VIRTUAL])
-                except Exception:
-                    pass
-            
-            hours_per_group["horas en " + sheet_name] = count
+        hours_per_group = {
+            "horas en " + sheet_name: sheet_hours.get(nombre, 0)
+            for sheet_name, sheet_hours in hours.items()
+        }
             
         user_hour_records.append({
             filename_column: nombre,
@@ -122,21 +189,32 @@ def converte_dfs_to_excel(sheet_2_df: dict[str, pd.DataFrame], filename_column:
             **hours_per_group
         })
 
-    files["_listado_completo.xlsx"] = generate_excel_content(
-        {"listado": pd.DataFrame.from_records(user_records)}
-    )
-    files["_horas_completo.xlsx"] = generate_excel_content(
-        {"listado": pd.DataFrame.from_records(user_hour_records)}
-    )
+    def _files() -> Iterator[tuple[str, bytes]]:
+        yield from generate_excel_contents(_workbooks())
+
+        for nombre, image in calendars.items():
+            if image is not None and nombre in filenames:
+                yield filenames[nombre].removesuffix(".xlsx") + ".png", image
+
+        yield "_listado_completo.xlsx", generate_excel_content(
+            {"listado": pd.DataFrame.from_records(user_records)}
+        )
+        yield "_horas_completo.xlsx", generate_excel_content(
+            {"listado": pd.DataFrame.from_records(user_hour_records)}
+        )
+
+    with write_zip(_files()) as archive:
+        data = archive.read()
+
     return {
-            "data": create_zip_in_memory(files),
+            "data": data,
             "file_name": f"{zip_stem}.zip",
             "mime": "application/zip",
     }
 
 
 
-def export_form(sdf: pd.DataFrame, filename_column: str, filters: list[tuple[str, str, list[str]]] = [], *, zip_stem: str = "archivo", mail_mapping: dict[str, tuple[str, str]] | None = None):
+def export_form(sdf: pd.DataFrame, filename_column: str, filters: list[tuple[str, str, list[str]]] = [], *, zip_stem: str = "archivo", mail_mapping: dict[str, tuple[str, str]] | None = None, calendars_option: bool = False):
     EXPORT_COLUMNS = [
         COL_FACULTAD, COL_CARRERA, COL_ASIGNATURA, COL_YEAR, COL_TURNO, COL_COMISION, COL_HORARIOS, COL_HORA_PRESENCIAL, COL_HORA_VIRTUAL, COL_OBSERVACIONES, COL_NOMBRE
     ]
@@ -160,9 +238,18 @@ def export_form(sdf: pd.DataFrame, filename_column: str, filters: list[tuple[str
             sheet_names.append(sheet_name_1)
             includes.append(include_status_1)
 
+        include_calendars = calendars_option and st.checkbox("Incluir el horario de cada persona (imagen)")
+
         # Every form must have a submit button.
         submitted = st.form_submit_button("Generar archivos")
         if submitted:
+            calendars_df = None
+            if include_calendars:
+                included = pd.Series(False, index=sdf.index)
+                for include_status_1, (_, col, _) in zip(includes, filters):
+                    included |= sdf[col].isin(include_status_1)
+                calendars_df = sdf[included]
+
             data_to_download = converte_dfs_to_excel(
                 {
                     sheet_name_1: sdf[sdf[col].isin(include_status_1)][EXPORT_COLUMNS]
@@ -171,6 +258,7 @@ def export_form(sdf: pd.DataFrame, filename_column: str, filters: list[tuple[str
                 filename_column=filename_column,
                 mail_mapping=mail_mapping,
                 zip_stem=zip_stem,
+                calendars_df=calendars_df,
             )
 
     if data_to_download is not None:
@@ -186,7 +274,8 @@ def persona_export_form(sdf: pd.DataFrame):
         filename_column=COL_NOMBRE,
         filters=[("Cargos activos", COL_STATUS, ["X", "XP"]), ("Cargos en licencia", COL_STATUS, ["LICENCIA"])], 
         mail_mapping=sdf.attrs["personas"],
-        zip_stem="asignaciones"
+        zip_stem="asignaciones",
+        calendars_option=True,
         )
 
 
@@ -0,0 +1,218 @@
+"""Caches of imported workbooks: on disk by content hash and in memory by sheet."""
+
+import collections
+import hashlib
+import io
+import json
+import os
+import pathlib
+import posixpath
+import re
+import threading
+import zipfile
+from typing import Any
+from xml.etree import ElementTree
+
+import pandas as pd
+
+# Bump when read() changes the DataFrame it produces.
+IMPORT_CACHE_VERSION = 3
+
+IMPORT_CACHE_DIR = pathlib.Path(
+    os.environ.get("ACAD_CACHE_DIR", pathlib.Path.home() / ".cache" / "acad")
+)
+
+IMPORT_CACHE_MAX_ENTRIES = 20
+
+# Memory held by the imported sheets kept to speed up re-imports.
+SHEET_CACHE_MAX_BYTES = int(os.environ.get("ACAD_SHEET_CACHE_MB", "128")) * 1024 * 1024
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_SHARED_STRING = re.compile(rb"<si\b[^>]*/>|<si\b[^>]*>.*?</si>", re.DOTALL)
+_SHARED_STRING_CELL = re.compile(rb'(<c\b[^>]*\bt="s"[^>]*>\s*<v>)(\d+)(</v>)')
+
+
+def read_content(p: Any) -> bytes:
+    """Returns the bytes of a path or of a file-like object (e.g. an uploaded file)."""
+    if isinstance(p, bytes):
+        return p
+    if isinstance(p, (str, os.PathLike)):
+        return pathlib.Path(p).read_bytes()
+    if hasattr(p, "getvalue"):
+        return p.getvalue()
+    p.seek(0)
+    return p.read()
+
+
+def content_key(content: bytes, *extra: Any) -> str:
+    h = hashlib.sha256(content)
+    h.update(repr((IMPORT_CACHE_VERSION, ) + extra).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _paths(cache_dir: pathlib.Path, key: str) -> tuple[pathlib.Path, pathlib.Path, pathlib.Path]:
+    """Returns the attrs path and the data path of each storage format of an entry."""
+    return cache_dir / f"{key}.json", cache_dir / f"{key}.parquet", cache_dir / f"{key}.pkl"
+
+
+def load(cache_dir: pathlib.Path, key: str) -> pd.DataFrame | None:
+    """Returns the cached DataFrame (with its attrs) or None."""
+    attrs_path, parquet_path, pickle_path = _paths(cache_dir, key)
+    try:
+        attrs = json.loads(attrs_path.read_text(encoding="utf-8"))
+        if attrs.get("format", "parquet") == "pickle":
+            df = pd.read_pickle(pickle_path)
+        else:
+            df = pd.read_parquet(parquet_path)
+    except Exception:
+        return None
+
+    df.attrs["import_log"] = attrs["import_log"]
+    df.attrs["personas"] = {
+        nombre: (area, email) for nombre, area, email in attrs["personas"]
+    }
+
+    attrs_path.touch()
+    return df
+
+
+def _store_data(df: pd.DataFrame, parquet_path: pathlib.Path, pickle_path: pathlib.Path) -> tuple[str, pathlib.Path]:
+    """Writes df to a temporary file, returns its format and path.
+
+    Parquet cannot store object columns that mix types (e.g. a column with
+    numbers and text), those DataFrames are pickled instead.
+    """
+    tmp_path = parquet_path.with_suffix(".parquet.tmp")
+    try:
+        df.to_parquet(tmp_path, index=False)
+        return "parquet", tmp_path
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+
+    tmp_path = pickle_path.with_suffix(".pkl.tmp")
+    df.to_pickle(tmp_path)
+    return "pickle", tmp_path
+
+
+def save(cache_dir: pathlib.Path, key: str, df: pd.DataFrame) -> str | None:
+    """Stores df and the import_log/personas attrs, returns why they cannot be stored or None.
+
+    Only the IMPORT_CACHE_MAX_ENTRIES most recently used entries are kept.
+    """
+    attrs_path, parquet_path, pickle_path = _paths(cache_dir, key)
+    tmp_attrs_path = attrs_path.with_suffix(".json.tmp")
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+        to_store = df.copy(deep=False)
+        to_store.attrs = {}
+        data_format, tmp_data_path = _store_data(to_store, parquet_path, pickle_path)
+
+        attrs = {
+            "format": data_format,
+            "import_log": df.attrs["import_log"],
+            "personas": [
+                [nombre, area, email] for nombre, (area, email) in df.attrs["personas"].items()
+            ],
+        }
+        tmp_attrs_path.write_text(json.dumps(attrs), encoding="utf-8")
+
+        # The data goes first so a replaced attrs file never points to a missing one.
+        os.replace(tmp_data_path, parquet_path if data_format == "parquet" else pickle_path)
+        os.replace(tmp_attrs_path, attrs_path)
+    except Exception as ex:
+        tmp_attrs_path.unlink(missing_ok=True)
+        for path in (parquet_path.with_suffix(".parquet.tmp"), pickle_path.with_suffix(".pkl.tmp")):
+            path.unlink(missing_ok=True)
+        return f"{type(ex).__name__}: {ex}"
+
+    entries = sorted(cache_dir.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for old in entries[IMPORT_CACHE_MAX_ENTRIES:]:
+        for path in _paths(cache_dir, old.stem):
+            path.unlink(missing_ok=True)
+
+    return None
+
+
+def sheet_fingerprints(content: bytes, *extra: Any) -> dict[str, str] | None:
+    """Returns a fingerprint of each sheet of an xlsx workbook, or None if it cannot be read.
+
+    Shared strings are resolved into the sheet content, so a sheet keeps its
+    fingerprint when other sheets are edited. Styles and the date system of the
+    workbook are part of every fingerprint as they change how values are read.
+    """
+    try:
+        with zipfile.ZipFile(io.BytesIO(content)) as zf:
+            names = set(zf.namelist())
+            workbook = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+            rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+            shared = zf.read("xl/sharedStrings.xml") if "xl/sharedStrings.xml" in names else b""
+            styles = zf.read("xl/styles.xml") if "xl/styles.xml" in names else b""
+
+            targets = {
+                rel.get("Id"): rel.get("Target")
+                for rel in rels.iter(f"{_NS_PKG_REL}Relationship")
+            }
+            workbook_pr = workbook.find(f"{_NS_MAIN}workbookPr")
+
+            common = hashlib.sha256(styles)
+            common.update(repr((IMPORT_CACHE_VERSION, ) + extra).encode("utf-8"))
+            common.update(repr(None if workbook_pr is None else workbook_pr.get("date1904")).encode("utf-8"))
+
+            strings = _SHARED_STRING.findall(shared)
+
+            out = {}
+            for sheet in workbook.iter(f"{_NS_MAIN}sheet"):
+                name = sheet.get("name")
+                target = targets[sheet.get(f"{_NS_REL}id")]
+                if target.startswith("/"):
+                    path = target.lstrip("/")
+                else:
+                    path = posixpath.normpath(posixpath.join("xl", target))
+                data = zf.read(path)
+
+                h = common.copy()
+                h.update(name.encode("utf-8"))
+                resolved, count = _SHARED_STRING_CELL.subn(
+                    lambda m: m.group(1) + strings[int(m.group(2))] + m.group(3), data
+                )
+                h.update(resolved)
+                if count != data.count(b't="s"'):
+                    # Some references were not resolved, so the sheet depends on all strings.
+                    h.update(shared)
+                out[name] = h.hexdigest()
+
+            return out
+    except Exception:
+        return None
+
+
+# fingerprint -> (imported sheet, size in bytes)
+_sheet_cache: collections.OrderedDict[str, tuple[Any, int]] = collections.OrderedDict()
+_sheet_cache_lock = threading.Lock()
+
+
+def get_sheet(fingerprint: str) -> Any:
+    """Returns the imported sheet stored with put_sheet, or None."""
+    with _sheet_cache_lock:
+        if fingerprint not in _sheet_cache:
+            return None
+        _sheet_cache.move_to_end(fingerprint)
+        return _sheet_cache[fingerprint][0]
+
+
+def put_sheet(fingerprint: str, value: Any, nbytes: int):
+    """Keeps an imported sheet of nbytes in memory, up to SHEET_CACHE_MAX_BYTES in total.
+
+    The least recently used sheets are dropped first.
+    """
+    with _sheet_cache_lock:
+        _sheet_cache[fingerprint] = (value, nbytes)
+        _sheet_cache.move_to_end(fingerprint)
+        total = sum(size for _, size in _sheet_cache.values())
+        while total > SHEET_CACHE_MAX_BYTES:
+            _, (_, size) = _sheet_cache.popitem(last=False)
+            total -= size
@@ -1,6 +1,10 @@
 import copy
 import datetime
+import functools
 import io
+import os
+import queue
+from typing import Any, NamedTuple
 
 # Set backend to non-gui 'Agg' BEFORE importing pyplot
 import matplotlib
@@ -9,8 +13,11 @@ matplotlib.use("Agg")
 
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
-from common import DOW, ScheduleEvent
+from common import COL_ASIGNATURA, COL_FACULTAD, DERIVED_COL_DOW, DERIVED_COL_START, DERIVED_COL_STOP, DOW, ScheduleEvent, horario_columns, time_to_minutes
 
 SLOT_MINUTES = 15 
 SLOTS_PER_HOUR = 60 // SLOT_MINUTES
@@ -25,71 +32,207 @@ def time_to_slot(t: datetime.time) -> int:
     return int(minutes // SLOT_MINUTES)
 
 
+def _grouped_occupancy(groups: np.ndarray, n_groups: int, dows: np.ndarray, starts: np.ndarray, stops: np.ndarray, weights: np.ndarray | None = None) -> np.ndarray:
+    """Returns a (n_groups, 7, TOTAL_SLOTS) array with the count of active events of each group.
+
+    Each event adds 1 (or its weight) at its start slot and -1 at its stop
+    slot of a difference array, whose cumulative sum is the occupancy.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    dows = np.asarray(dows, dtype=np.int64)
+    start_slots = np.asarray(starts, dtype=np.int64) // SLOT_MINUTES
+    stop_slots = np.asarray(stops, dtype=np.int64) // SLOT_MINUTES
+
+    # Handle edge cases where event ends at midnight or has zero length
+    stop_slots = np.where(stop_slots <= start_slots, TOTAL_SLOTS, stop_slots)
+
+    width = TOTAL_SLOTS + 1
+    offset = (groups * 7 + dows) * width
+    size = n_groups * 7 * width
+    diff = (
+        np.bincount(offset + start_slots, weights=weights, minlength=size)
+        - np.bincount(offset + stop_slots, weights=weights, minlength=size)
+    )
+    return np.cumsum(diff.reshape(n_groups, 7, width), axis=2)[:, :, :TOTAL_SLOTS]
+
+
+def occupancy_from_minutes(dows: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Returns a (TOTAL_SLOTS, 7) array where matrix[slot, day] = count of active events.
+
+    Events are given as arrays of day of the week and start/stop minutes.
+    """
+    return _grouped_occupancy(np.zeros(len(dows), dtype=np.int64), 1, dows, starts, stops)[0].T
+
+
 def build_occupancy_matrix(
     events: list[tuple[DOW, ScheduleEvent]],
 ) -> np.ndarray:
-    """Returns a (7, TOTAL_SLOTS) array where matrix[day, slot] = count of active events."""
-    matrix = np.zeros((7, TOTAL_SLOTS), dtype=int)
+    """Returns a (TOTAL_SLOTS, 7) array where matrix[slot, day] = count of active events."""
+    return occupancy_from_minutes(
+        [dow for dow, _ in events],
+        [time_to_minutes(event.start) for _, event in events],
+        [time_to_minutes(event.stop) for _, event in events],
+    )
+
 
-    for dow, event in events:
-        start_slot = time_to_slot(event.start)
-        stop_slot = time_to_slot(event.stop)
+def occupancy_matrix(df: pd.DataFrame) -> np.ndarray:
+    """Occupancy of the rows of df (see occupancy_from_minutes), without building events."""
+    parsed = horario_columns(df)
+    return occupancy_from_minutes(
+        parsed[DERIVED_COL_DOW].to_numpy(),
+        parsed[DERIVED_COL_START].to_numpy(),
+        parsed[DERIVED_COL_STOP].to_numpy(),
+    )
 
-        # Handle edge cases where event ends at midnight or has zero length
-        if stop_slot <= start_slot:
-            stop_slot = TOTAL_SLOTS
 
-        matrix[dow, start_slot:stop_slot] += 1
+class OccupancyCube(NamedTuple):
+    """Occupancy of every (faculty, subject) pair, built once per import.
 
-    return matrix.T
+    counts[group, day, slot] is the count of active events of the pair
+    (facultades[group], asignaturas[group]).
+    """
+    facultades: np.ndarray
+    asignaturas: np.ndarray
+    counts: np.ndarray
 
+    def matrix(self, facultad: Any = None, asignatura: Any = None) -> np.ndarray:
+        """Returns the (TOTAL_SLOTS, 7) occupancy of the rows with facultad and asignatura (None for all)."""
+        keep = np.ones(len(self.facultades), dtype=bool)
+        if facultad is not None:
+            keep &= self.facultades == facultad
+        if asignatura is not None:
+            keep &= self.asignaturas == asignatura
+        return self.counts[keep].sum(axis=0, dtype=np.int64).T
 
-def generate_occupancy_figure(
-        events: list[tuple[DOW, ScheduleEvent]], 
-        buffer: io.BytesIO,
-        dows: list[DOW],
-        start: datetime.time,
-        stop: datetime.time,
-    ):
 
-    matrix = build_occupancy_matrix(events)
-    matrix = matrix[:, [n in dows for n in range(7)]]
-    
-    day_ticks = np.asarray(dows)
-    day_labels = [DAY_NAMES[dow] for dow in dows]
-    fig, ax = plt.subplots(figsize=(14, 4))
+def build_occupancy_cube(df: pd.DataFrame) -> OccupancyCube:
+    parsed = horario_columns(df)
 
-    my_cmap = copy.copy(plt.colormaps['YlOrRd'])
-    my_cmap.set_under('white')
+    codes = df.groupby([COL_FACULTAD, COL_ASIGNATURA], sort=False, observed=True, dropna=False).ngroup().to_numpy()
+    # position of the first row of each group
+    _, first = np.unique(codes, return_index=True)
 
-    cax = ax.imshow(matrix, cmap=my_cmap, aspect="auto", interpolation="nearest", vmin=0.0001)
+    counts = _grouped_occupancy(
+        codes, len(first),
+        parsed[DERIVED_COL_DOW].to_numpy(),
+        parsed[DERIVED_COL_START].to_numpy(),
+        parsed[DERIVED_COL_STOP].to_numpy(),
+    )
+    return OccupancyCube(
+        df[COL_FACULTAD].to_numpy(dtype=object)[first],
+        df[COL_ASIGNATURA].to_numpy(dtype=object)[first],
+        counts.astype(np.int32),
+    )
 
-    hour_ticks = np.arange(0, TOTAL_SLOTS, SLOTS_PER_HOUR)
-    hour_labels = [f"{h:02d}:00" for h in range(24)]
 
-    ax.set_xticks(day_ticks)
-    ax.set_xticklabels(day_labels)
+class _OccupancyFigure:
+    """Heatmap figure whose static parts (colormap, colorbar, hour axis, labels) are built once.
 
-    ax.set_yticks(hour_ticks)
-    ax.set_yticklabels(hour_labels)
-    
-    ax.set_ylim(
-        time_to_slot(stop.replace(minute=0, second=0, microsecond=0)),
-        time_to_slot(start.replace(minute=0, second=0, microsecond=0))
-    )
-    ax.set_title("Ocupación", fontsize=14, pad=12)
-    ax.set_ylabel("Hora")
-    ax.set_xlabel("Dia")
+    The layout is also computed once, with every day shown, so render
+    only updates the data, the visible days and the limits.
+    """
+
+    def __init__(self):
+        self.fig = Figure(figsize=(14, 4))
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.subplots()
+
+        my_cmap = copy.copy(plt.colormaps['YlOrRd'])
+        my_cmap.set_under('white')
+
+        self.image = self.ax.imshow(
+            np.zeros((TOTAL_SLOTS, 7)), cmap=my_cmap, aspect="auto", interpolation="nearest", vmin=0.0001, vmax=1
+        )
 
-    cbar = fig.colorbar(cax, ax=ax, orientation="vertical", pad=0.02)
-    cbar.set_label("Cantidad de cursos")
+        hour_ticks = np.arange(0, TOTAL_SLOTS, SLOTS_PER_HOUR)
+        hour_labels = [f"{h:02d}:00" for h in range(24)]
 
-    plt.tight_layout()
-    plt.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
+        self.ax.set_yticks(hour_ticks)
+        self.ax.set_yticklabels(hour_labels)
 
-    # Clean up memory figures explicitly
-    plt.close(fig)
+        self.ax.set_title("Ocupación", fontsize=14, pad=12)
+        self.ax.set_ylabel("Hora")
+        self.ax.set_xlabel("Dia")
 
-    # Move cursor to the start of the BytesIO buffer
-    buffer.seek(0)
-    return buffer
\ No newline at end of file
+        cbar = self.fig.colorbar(self.image, ax=self.ax, orientation="vertical", pad=0.02)
+        cbar.set_label("Cantidad de cursos")
+
+        self.ax.set_xticks(np.arange(7))
+        self.ax.set_xticklabels(DAY_NAMES)
+        self.fig.tight_layout()
+
+    def render(self, matrix: np.ndarray, dows: list[DOW], start: datetime.time, stop: datetime.time, dpi: int) -> bytes:
+        """matrix has a column per day in dows."""
+        # with no days the axis keeps the width of one
+        width = max(len(dows), 1)
+        self.image.set_data(matrix)
+        self.image.set_extent((-0.5, width - 0.5, TOTAL_SLOTS - 0.5, -0.5))
+        # at least 1, as there is nothing to scale with no days or no courses
+        self.image.set_clim(0.0001, max(matrix.max(initial=0), 1))
+
+        self.ax.set_xticks(np.arange(len(dows)))
+        self.ax.set_xticklabels([DAY_NAMES[dow] for dow in dows])
+        self.ax.set_xlim(-0.5, width - 0.5)
+
+        self.ax.set_ylim(
+            time_to_slot(stop.replace(minute=0, second=0, microsecond=0)),
+            time_to_slot(start.replace(minute=0, second=0, microsecond=0))
+        )
+
+        # Printed on the canvas instead of savefig, which draws the figure
+        # twice to lay it out again.
+        self.fig.set_dpi(dpi)
+        buffer = io.BytesIO()
+        self.canvas.print_png(buffer)
+        return buffer.getvalue()
+
+
+OCCUPANCY_DPI = int(os.environ.get("ACAD_OCCUPANCY_DPI", "150"))
+
+# Lower resolution for quick previews, about 6 times fewer pixels.
+OCCUPANCY_FAST_DPI = 60
+
+# Number of rendered heatmaps kept in memory.
+OCCUPANCY_CACHE_SIZE = 64
+
+# Idle figures kept for reuse. A figure is checked out by one render
+# (thread) at a time, so concurrent sessions never share one.
+FIGURE_POOL_SIZE = 4
+
+_figure_pool: queue.SimpleQueue[_OccupancyFigure] = queue.SimpleQueue()
+
+
+@functools.lru_cache(maxsize=OCCUPANCY_CACHE_SIZE)
+def _render_occupancy(data: bytes, dows: tuple[DOW, ...], start: datetime.time, stop: datetime.time, dpi: int) -> bytes:
+    matrix = np.frombuffer(data, dtype=np.int64).reshape(TOTAL_SLOTS, len(dows))
+
+    try:
+        figure = _figure_pool.get_nowait()
+    except queue.Empty:
+        figure = _OccupancyFigure()
+
+    try:
+        return figure.render(matrix, list(dows), start, stop, dpi)
+    finally:
+        if _figure_pool.qsize() < FIGURE_POOL_SIZE:
+            _figure_pool.put(figure)
+
+
+def generate_occupancy_figure(
+        matrix: np.ndarray, 
+        dows: list[DOW],
+        start: datetime.time,
+        stop: datetime.time,
+        *,
+        dpi: int = OCCUPANCY_DPI,
+    ) -> bytes:
+    """Returns the occupancy heatmap (see occupancy_from_minutes) rendered as PNG.
+
+    Days are shown in week order. Figures are reused from a pool instead
+    of building one per render, and are not registered in pyplot, whose
+    global state is shared by all the sessions (threads) of the server.
+    The last renders are cached, so going back to a filter is immediate.
+    """
+    dows = tuple(sorted(set(dows)))
+    data = np.ascontiguousarray(matrix[:, list(dows)], dtype=np.int64).tobytes()
+    return _render_occupancy(data, dows, start, stop, dpi)
@@ -0,0 +1,28 @@
+import streamlit as st
+
+from common import find_overlaps, COL_STATUS
+
+if "df" not in st.session_state:
+    st.warning("No hay datos para usar page_report_overlap")
+    st.stop()
+
+df = st.session_state.df
+
+statuses = sorted(df[COL_STATUS].unique())
+include = st.multiselect(
+    f"Incluir asignaciones con {COL_STATUS}",
+    statuses,
+    [status for status in ("X", "XP") if status in statuses],
+)
+
+overlaps = find_overlaps(df[df[COL_STATUS].isin(include)])
+
+if len(overlaps):
+    st.caption(f":warning: Se detectaron :red[{len(overlaps)}] superposiciones de horario.")
+    st.dataframe(
+        overlaps,
+        width='stretch',
+        hide_index=True,
+    )
+else:
+    st.caption("No se detectaron superposiciones de horario :tada:")
@@ -1,6 +1,6 @@
 import streamlit as st
 
-from common import generate_schedule_image, build_schedule, CALENDAR_BUFFER, COL_FACULTAD, COL_ASIGNATURA, DERIVED_COL_YEAR_TURNO_COM, df_to_records
+from common import render_schedule, build_schedule, COL_FACULTAD, COL_ASIGNATURA, DERIVED_COL_YEAR_TURNO_COM, show_table
 
 
 if "df" not in st.session_state:
@@ -30,7 +30,7 @@ if com is not None:
     sch = build_schedule(sdf3)
 
     try:
-        generate_schedule_image(sch, CALENDAR_BUFFER)
+        calendar_image = render_schedule(sch)
         calendar_err = ""
     except Exception as ex:
         calendar_err = f"No se pudo generar el horario. Revise que la planilla este correcta.\n{ex}"
@@ -38,13 +38,9 @@ if com is not None:
     if calendar_err:
         st.error(calendar_err)
     else:
-        st.image(CALENDAR_BUFFER)        
+        st.image(calendar_image)        
 
     try:
-        st.dataframe(
-            df_to_records(sdf3), 
-            height=300, width='stretch',
-            hide_index=True
-        )
+        show_table(sdf3, height=300)
     except Exception as ex:
         st.error(f"No se pudo mostrar la tabla. {ex}")
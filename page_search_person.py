@@ -1,6 +1,6 @@
 import streamlit as st
 
-from common import CALENDAR_BUFFER, person_view, COL_NOMBRE
+from common import person_view, COL_NOMBRE
 
 
 if "df" not in st.session_state:
@@ -12,8 +12,7 @@ try:
     dview = person_view(
         df,
         sorted({name for name in df[COL_NOMBRE] if name}),
-        st.session_state.schedule_by_name,
-        CALENDAR_BUFFER
+        st.session_state.person_index,
     ) 
 except Exception as ex:
     st.error(f"No se puedo mostrar la vista: {ex}")
\ No newline at end of file
@@ -2,26 +2,32 @@ from collections import defaultdict
 import streamlit as st
 import pandas as pd
 import datetime
+import numpy as np
 
-from common import DOW_2_NUM, COL_NOMBRE, person_view, build_schedule, CALENDAR_BUFFER, COL_STATUS, com_string, parse_into_event, ScheduleEvent, Schedule, EVENT_TAG_VACANT, COL_FACULTAD
+from common import DOW_2_NUM, COL_NOMBRE, person_view, COL_STATUS, com_strings, schedule_events, ScheduleEvent, Schedule, EVENT_TAG_VACANT, COL_FACULTAD, DATA_CACHE_MAX_ENTRIES, DATA_CACHE_TTL
 
 TODAS = "Todas"
 
-@st.cache_data
+@st.cache_data(max_entries=DATA_CACHE_MAX_ENTRIES, ttl=DATA_CACHE_TTL)
+def get_facultad_vacant_options(vdf: pd.DataFrame) -> dict[str, tuple[int, ScheduleEvent]]:
+    return dict(zip(com_strings(vdf), schedule_events(vdf, status_prefix=False)))
+
+
 def get_vacant_options(sdf: pd.DataFrame) -> dict[str, tuple[int, ScheduleEvent]]:
-    return dict(sorted(
-        { com_string(row): parse_into_event(row)
-          for _, row in sdf[sdf[COL_STATUS] == "VACANTE"].iterrows()
-        }.items()
-    ))
+    """Vacant slots by com_string, cached per faculty so a re-import keeps the unchanged ones."""
+    vdf = sdf[sdf[COL_STATUS] == "VACANTE"]
+    out = {}
+    for _, fdf in vdf.groupby(COL_FACULTAD, sort=False, observed=True, dropna=False):
+        out.update(get_facultad_vacant_options(fdf.reset_index(drop=True)))
+    return dict(sorted(out.items()))
 
 
-@st.cache_data
+@st.cache_data(max_entries=DATA_CACHE_MAX_ENTRIES, ttl=DATA_CACHE_TTL)
 def get_facultad_options(sdf: pd.DataFrame) -> list[str]:
     return [TODAS, ] + sorted(sdf[COL_FACULTAD].unique())
 
 
-@st.cache_data
+@st.cache_data(max_entries=DATA_CACHE_MAX_ENTRIES, ttl=DATA_CACHE_TTL)
 def get_areas(d: dict[str, tuple[str, str]]) -> dict[str, list[str]]:
     out = defaultdict(list)
 
@@ -36,7 +42,8 @@ if "df" not in st.session_state:
     st.stop()
 
 df = st.session_state.df
-schedule_by_name = st.session_state.schedule_by_name
+person_index = st.session_state.person_index
+availability = st.session_state.availability
 
 picker_options = get_vacant_options(df)
 
@@ -74,11 +81,11 @@ if df.attrs["personas"]:
         default=sorted(AREAS_2_PERSONAS.keys()),
     )
     if areas:
-        sel = df[COL_NOMBRE].isin(sum((AREAS_2_PERSONAS[k] for k in areas), start=[]))
+        sel = set(sum((AREAS_2_PERSONAS[k] for k in areas), start=[]))
     else:
-        sel = slice(-1)
+        sel = None
 else:
-    sel =  slice(-1)
+    sel = None
 
 try:
     facultad_actual = picker.split(",")[0]
@@ -105,44 +112,35 @@ with st.container(border=True):
     with cols[2]:
         misma_franja = st.checkbox("en la misma franja horaria")
 
-options = []
-for selected_name, gdf in df[sel].groupby(COL_NOMBRE):
-    if selected_name == "":
-        continue
-    if misma_facultad and not facultad_actual in gdf[COL_FACULTAD].values:
-        continue
-    if selected_name in schedule_by_name:
-        sch = schedule_by_name[selected_name]
+dow = DOW_2_NUM[day]
+
+keep = availability.names != ""
+if sel is not None:
+    keep &= np.isin(availability.names, list(sel))
+if misma_facultad:
+    keep &= np.isin(availability.names, df.loc[df[COL_FACULTAD] == facultad_actual, COL_NOMBRE].unique())
+keep &= ~availability.is_busy(dow, start, stop)
+if present:
+    keep &= availability.has_events[:, dow]
+if misma_franja:
+    if start < datetime.time(13):
+        franja_start, franja_stop = datetime.time(8), datetime.time(13)
+    elif start < datetime.time(18):
+        franja_start, franja_stop = datetime.time(13), datetime.time(18)
     else:
-        schedule_by_name[selected_name] = sch = build_schedule(gdf)
-    if sch.is_busy(DOW_2_NUM[day], start, stop):
-        continue
-    if present and not sch[DOW_2_NUM[day]]:
-        continue
-    if misma_franja:
-        if start < datetime.time(13):
-            franja_start, franja_stop = datetime.time(8), datetime.time(13)
-        elif start < datetime.time(18):
-            franja_start, franja_stop = datetime.time(13), datetime.time(18)
-        else:
-            franja_start, franja_stop = datetime.time(18), datetime.time(23)
-        for dow in range(7):
-            if sch.is_busy(dow, franja_start, franja_stop):
-                break
-        else:
-            continue
-    options.append(selected_name)
+        franja_start, franja_stop = datetime.time(18), datetime.time(23)
+    keep &= availability.is_busy(None, franja_start, franja_stop)
+
+options = availability.names[keep].tolist()
 
 sch = Schedule()
-sch.add_event(DOW_2_NUM[day], ScheduleEvent(start, stop, "Curso a completar", EVENT_TAG_VACANT))
-schedule_by_name["Curso a completar"] = sch
+sch.add_event(dow, ScheduleEvent(start, stop, "Curso a completar", EVENT_TAG_VACANT))
 
 st.divider()
 
 dview = person_view(
     df,
     options,
-    schedule_by_name,
-    CALENDAR_BUFFER,
+    person_index,
     sch
 ) 
\ No newline at end of file
@@ -1,15 +1,14 @@
 import streamlit as st
 
 from common import (
-    CALENDAR_BUFFER,
     COL_ASIGNATURA,
     COL_FACULTAD,
     DERIVED_COL_YEAR_TURNO_COM,
     DOW_2_NUM,
-    build_schedule,
-    df_to_records,
+    show_table,
 )
-from occupancy import generate_occupancy_figure
+from analytics import MODALITIES, STATUS_GROUPS, faculty_occupancy, modality_occupancy, peak_summary, status_occupancy, valid_rows
+from occupancy import OCCUPANCY_DPI, OCCUPANCY_FAST_DPI, generate_occupancy_figure, occupancy_matrix
 
 NO_FILTER = "Sin filtro"
 
@@ -32,6 +31,8 @@ with col1:
 with col2:
     stop = st.time_input("Hasta", key="page_search_slot_stop", value="23:00")
 
+fast = st.checkbox("Imagen de menor resolución (más rápida)")
+
 facultad = st.selectbox("Facultad", [NO_FILTER] + sorted(df[COL_FACULTAD].unique()))
 if facultad and facultad != NO_FILTER:
     sdf1 = df[df[COL_FACULTAD] == facultad]
@@ -54,13 +55,18 @@ else:
 
 calendar_err = None
 try:
-    sch = build_schedule(sdf3)
-    events = list(sch.yield_events())
-    if events:
-        generate_occupancy_figure(
-            events, 
-            CALENDAR_BUFFER,
-            list(map(DOW_2_NUM.get, dows)), start, stop
+    if len(sdf3):
+        if com and com != NO_FILTER:
+            matrix = occupancy_matrix(sdf3)
+        else:
+            matrix = st.session_state.occupancy.matrix(
+                facultad if facultad and facultad != NO_FILTER else None,
+                asignatura if asignatura and asignatura != NO_FILTER else None,
+            )
+        occupancy_png = generate_occupancy_figure(
+            matrix, 
+            list(map(DOW_2_NUM.get, dows)), start, stop,
+            dpi=OCCUPANCY_FAST_DPI if fast else OCCUPANCY_DPI,
         )
     else:
         calendar_err = "No hay cursos con estas características."
@@ -70,13 +76,33 @@ except Exception as ex:
 if calendar_err:
     st.error(calendar_err)
 else:
-    st.image(CALENDAR_BUFFER)       
+    st.image(occupancy_png)       
 
     try:
-        st.dataframe(
-            df_to_records(sdf3), 
-            height=300, width='stretch',
-            hide_index=True
-        )
+        show_table(sdf3, height=300)
     except Exception as ex:
         st.error(f"No se pudo mostrar la tabla. {ex}")
+
+    st.subheader("Análisis de ocupación")
+    try:
+        selected_dows = list(map(DOW_2_NUM.get, dows))
+        vdf = valid_rows(sdf3)
+        if len(vdf) < len(sdf3):
+            st.caption(f"Se excluyen {len(sdf3) - len(vdf)} filas con horario inválido.")
+
+        faculties, by_faculty = faculty_occupancy(vdf)
+        tab_modality, tab_status, tab_faculty = st.tabs(["Por modalidad", "Por estado", "Pico por facultad"])
+        for tab, summary in (
+            (tab_modality, peak_summary(modality_occupancy(vdf), MODALITIES, selected_dows, start, stop, label_column="Modalidad")),
+            (tab_status, peak_summary(status_occupancy(vdf), list(STATUS_GROUPS), selected_dows, start, stop, label_column="Estado")),
+            (tab_faculty, peak_summary(by_faculty, faculties, selected_dows, start, stop, label_column=COL_FACULTAD)),
+        ):
+            with tab:
+                st.dataframe(summary.round(1), width='stretch', hide_index=True)
+        st.caption(
+            "Pico: máxima cantidad de cursos simultáneos en el rango. "
+            "Horas: horas de clase dictadas en el rango. "
+            "Por modalidad, cada curso se reparte según sus horas presenciales y virtuales."
+        )
+    except Exception as ex:
+        st.error(f"No se pudo calcular el análisis. {ex}")
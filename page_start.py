@@ -2,7 +2,7 @@
 
 import streamlit as st
 
-from common import COL_NOMBRE, MULTICOL_COMISION, COL_FACULTAD, COL_CARRERA, REQUIRED_COLS, version
+from common import COL_NOMBRE, DERIVED_COL_COM_KEY, COL_FACULTAD, COL_CARRERA, REQUIRED_COLS, version
 
 
 if "df" not in st.session_state:
@@ -39,8 +39,8 @@ f"""
 **Descripción de los datos**
 - {len(df)} filas.
 - {len(df[COL_FACULTAD].unique())} facultades.
-- {len(df.groupby([COL_FACULTAD, COL_CARRERA]))} carreras.
-- {len(df.groupby(MULTICOL_COMISION))} comisiones.
+- {len(df.groupby([COL_FACULTAD, COL_CARRERA], observed=True))} carreras.
+- {df[DERIVED_COL_COM_KEY].nunique()} comisiones.
 - {len(df[COL_NOMBRE].unique())} personas asignadas.
 - {len(df.attrs["personas"])} personas en la lista de mails.
 
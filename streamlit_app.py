@@ -70,6 +70,7 @@ def main():
             "Reporte 📄": [
                 st.Page("page_report_import.py", title="de importación"),
                 st.Page("page_report_time.py", title="de errores de horario"),
+                st.Page("page_report_overlap.py", title="de superposición de horarios"),
                 st.Page("page_report_names.py", title="de mail definido"),
                 st.Page("page_report_personal_file.py", title="de horarios por persona", icon=":material/download:"),
                 st.Page("page_report_school_file.py", title="de horarios por facultad", icon=":material/download:"),
@@ -0,0 +1,150 @@
+"""Tests of the web import (common.download) against a local HTTP stub server.
+
+    python -m unittest test_download
+"""
+
+import http.server
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+# Keep the import cache of the tests out of the user cache.
+os.environ.setdefault("ACAD_CACHE_DIR", tempfile.mkdtemp(prefix="acad-test-"))
+
+import pandas as pd
+import requests
+from streamlit.testing.v1 import AppTest
+
+import common
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Mon, 05 Oct 2026 10:00:00 GMT"
+BIG_BODY = b"x" * (200 * 1024)
+
+
+def make_workbook() -> bytes:
+    df = pd.DataFrame({
+        common.COL_CARRERA: ["Carrera 1", "Carrera 1"],
+        common.COL_ASIGNATURA: ["Asignatura 1", "Asignatura 2"],
+        common.COL_YEAR: [1, 2],
+        common.COL_TURNO: ["M", "T"],
+        common.COL_COMISION: ["C1", "C1"],
+        common.COL_NOMBRE: ["Persona 1", "Persona 2"],
+        common.COL_HORARIOS: ["Lunes de 8 a 10 h", "Martes de 14 a 16 h"],
+        common.COL_STATUS: ["X", "X"],
+        common.COL_HORA_PRESENCIAL: ["120'", "120'"],
+        common.COL_HORA_VIRTUAL: ["", ""],
+        common.COL_OBSERVACIONES: ["", ""],
+    })
+    buff = io.BytesIO()
+    with pd.ExcelWriter(buff, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name="FI", index=False)
+    return buff.getvalue()
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the workbook with an ETag (304 if it matches) and large bodies for the size cap."""
+
+    workbook = b""
+    requests_headers: list[dict[str, str]] = []
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        StubHandler.requests_headers.append(dict(self.headers))
+
+        if path == "/plan.xlsx":
+            if self.headers.get("If-None-Match") == ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(self.workbook)))
+            self.send_header("ETag", ETAG)
+            self.send_header("Last-Modified", LAST_MODIFIED)
+            self.end_headers()
+            self.wfile.write(self.workbook)
+
+        elif path == "/big-with-length":
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(BIG_BODY)))
+            self.end_headers()
+            self.wfile.write(BIG_BODY)
+
+        elif path == "/big-without-length":
+            # HTTP/1.0 without Content-Length, the body ends when the connection closes.
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(BIG_BODY)
+
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DownloadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        StubHandler.workbook = make_workbook()
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubHandler.requests_headers.clear()
+
+    def test_download_then_not_modified(self):
+        url = f"{self.base_url}/plan.xlsx?web=1"
+        at = AppTest.from_string(
+            f"import common\ncommon.download({url!r})", default_timeout=60
+        )
+
+        at.run()
+        self.assertFalse(at.exception)
+        self.assertFalse(at.error)
+        df = at.session_state.df
+        self.assertEqual(len(df), 2)
+        self.assertEqual(df.attrs["url"], url)
+        self.assertEqual(df.attrs["etag"], ETAG)
+        self.assertEqual(df.attrs["last_modified"], LAST_MODIFIED)
+        self.assertNotIn("If-None-Match", StubHandler.requests_headers[0])
+
+        at.run()
+        self.assertFalse(at.exception)
+        self.assertEqual(StubHandler.requests_headers[1]["If-None-Match"], ETAG)
+        self.assertEqual(StubHandler.requests_headers[1]["If-Modified-Since"], LAST_MODIFIED)
+        self.assertIn("no cambió", at.info[0].value)
+        self.assertIs(at.session_state.df, df)
+
+    def test_size_cap(self):
+        for path in ("/big-with-length", "/big-without-length"):
+            with self.subTest(path=path):
+                with requests.get(self.base_url + path, stream=True, timeout=10) as response:
+                    with self.assertRaisesRegex(Exception, r"tamaño máximo \(64 KB\)"):
+                        common.stream_to_file(response, max_bytes=64 * 1024)
+
+    def test_within_size_cap(self):
+        with requests.get(self.base_url + "/big-without-length", stream=True, timeout=10) as response:
+            seen = []
+            with common.stream_to_file(response, max_bytes=len(BIG_BODY), progress=lambda done, total: seen.append((done, total))) as out:
+                self.assertEqual(out.read(), BIG_BODY)
+        self.assertEqual(seen[-1], (len(BIG_BODY), None))
+
+    def test_size_text(self):
+        self.assertEqual(common.size_text(100 * 1024 * 1024), "100 MB")
+        self.assertEqual(common.size_text(512 * 1024), "512 KB")
+
+
+if __name__ == "__main__":
+    unittest.main()